@@ -38,7 +38,7 @@ from .exceptions import (
     MOSSError,
 )
 from .config import ConfigManager
-from .template_engine import TemplateEngine
+from .template_engine import TemplateEngine, clear_jinja_cache
 from .image_selector import ImageSelector
 from .moss_uploader import MOSSUploader
 from .api_client import APIClient
@@ -88,4 +88,6 @@ __all__ = [
     "StateManager",
     "TextGenerator",
     "GenerationEngine",
+    # Utilities
+    "clear_jinja_cache",
 ]
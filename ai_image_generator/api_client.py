@@ -5,11 +5,12 @@ API客户端 - 负责与kie.ai API交互
 import logging
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 from .exceptions import APIError
+from .json_utils import dumps_bytes
 from .models import TaskResult
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,11 @@ class APIClient:
         self.poll_interval = poll_interval
         self.max_wait = max_wait
         
+        # 请求体中固定不变的片段预先序列化（不含外层花括号），create_task 只编码变化的字段
+        self._model_payload = dumps_bytes({"model": self.model})[1:-1]
+        # 输出参数片段：(aspect_ratio, resolution, output_format) -> 序列化片段
+        self._output_payloads: Dict[Tuple[str, str, str], bytes] = {}
+        
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {api_key}",
@@ -79,21 +85,32 @@ class APIClient:
         
         url = f"{self.base_url}/jobs/createTask"
         
-        payload = {
-            "model": self.model,
-            "input": {
-                "prompt": prompt,
-                "image_input": image_urls,
+        # 同一次运行中输出参数不变，只在第一次出现时序列化
+        output_key = (aspect_ratio, resolution, output_format)
+        output_payload = self._output_payloads.get(output_key)
+        if output_payload is None:
+            output_payload = dumps_bytes({
                 "aspect_ratio": aspect_ratio,
                 "resolution": resolution,
                 "output_format": output_format,
-            },
-        }
+            })[1:-1]
+            self._output_payloads[output_key] = output_payload
+        
+        # {"model": ..., "input": {"prompt": ..., "image_input": [...], <输出参数>}}
+        body = b"".join((
+            b"{",
+            self._model_payload,
+            b',"input":{',
+            dumps_bytes({"prompt": prompt, "image_input": image_urls})[1:-1],
+            b",",
+            output_payload,
+            b"}}",
+        ))
         
         logger.debug(f"创建任务: prompt长度={len(prompt)}, 图片数={len(image_urls)}")
         
         try:
-            response = self.session.post(url, json=payload, timeout=30)
+            response = self.session.post(url, data=body, timeout=30)
             
             # 记录原始响应用于调试
             logger.debug(f"API响应状态码: {response.status_code}")
@@ -0,0 +1,63 @@
+"""
+异步工具 - 为同步接口提供常驻的后台事件循环
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """
+    在守护线程中常驻运行的事件循环（首次使用时启动，close 后再次使用会重新启动）
+
+    同步接口通过它执行协程，不必每次 asyncio.run 新建事件循环；
+    绑定在事件循环上的异步客户端（连接池等）也可以跨调用复用
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 后台线程名称
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """后台事件循环是否已启动"""
+        return self._loop is not None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """获取后台事件循环（未启动时启动）"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """
+        在后台事件循环中执行协程并等待结果（可被多个线程同时调用）
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            协程的返回值
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.get_loop()).result()
+
+    def close(self):
+        """停止后台事件循环并等待线程退出"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
@@ -333,6 +333,7 @@ def create_engine(
             folder_path=global_config.gcs_folder_path,
             credentials_path=global_config.gcs_credentials_path or None,
             project_id=global_config.gcs_project_id or None,
+            api_endpoint=global_config.gcs_api_endpoint or None,
             make_public=True,
         )
     else:
@@ -363,6 +364,8 @@ def create_engine(
             site_url=global_config.openrouter_image_site_url,
             site_name=global_config.openrouter_image_site_name,
             proxy=global_config.openrouter_image_proxy or None,
+            passthrough_hosts=global_config.openrouter_image_passthrough_hosts,
+            reference_max_edge=global_config.openrouter_image_reference_max_edge or None,
         )
     elif image_model == "openrouter/nano-banana-pro":
         # OpenRouter Nano Banana Pro (google/gemini-3-pro-image-preview)
@@ -376,6 +379,8 @@ def create_engine(
             site_url=global_config.openrouter_image_site_url,
             site_name=global_config.openrouter_image_site_name,
             proxy=global_config.openrouter_image_proxy or None,
+            passthrough_hosts=global_config.openrouter_image_passthrough_hosts,
+            reference_max_edge=global_config.openrouter_image_reference_max_edge or None,
         )
     elif image_model == "seedream/4.5-edit":
         # KieAI Seedream 4.5 Edit
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from .exceptions import ConfigurationError, PathNotFoundError
+from .json_utils import load_json_file
 from .models import (
     GlobalConfig,
     ImageSelectionConfig,
@@ -49,8 +50,7 @@ class ConfigManager:
             raise PathNotFoundError(str(path), f"配置文件不存在: {path}")
         
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_json_file(path)
             if not isinstance(data, dict):
                 raise ConfigurationError(f"配置文件根对象必须是字典: {path}")
             return data
@@ -124,6 +124,7 @@ class ConfigManager:
             gcs_folder_path=gcs_cfg.get("folder_path", "ImageUpload"),
             gcs_credentials_path=os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or gcs_cfg.get("credentials_path", ""),
             gcs_project_id=os.getenv("GOOGLE_CLOUD_PROJECT") or gcs_cfg.get("project_id", ""),
+            gcs_api_endpoint=gcs_cfg.get("api_endpoint", ""),
             # OpenRouter 图片生成配置
             openrouter_image_api_key=openrouter_image_api_key,
             openrouter_image_base_url=(
@@ -145,6 +146,11 @@ class ConfigManager:
                 os.getenv("OPENROUTER_PROXY") or 
                 openrouter_cfg.get("proxy", "")
             ),
+            openrouter_image_passthrough_hosts=(
+                list(openrouter_image_cfg["passthrough_hosts"])
+                if openrouter_image_cfg.get("passthrough_hosts") is not None else None
+            ),
+            openrouter_image_reference_max_edge=int(openrouter_image_cfg.get("reference_max_edge") or 0),
             # OpenRouter 文案生成配置（保持原有）
             openrouter_api_key=os.getenv("OPENROUTER_API_KEY") or openrouter_cfg.get("api_key", ""),
             openrouter_base_url=os.getenv("OPENROUTER_BASE_URL") or openrouter_cfg.get("base_url", "https://openrouter.ai/api/v1"),
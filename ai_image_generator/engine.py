@@ -2,6 +2,7 @@
 生成引擎 - 核心协调器
 """
 
+import functools
 import logging
 import random
 import shutil
@@ -40,6 +41,16 @@ UploaderType = Union[MOSSUploader, GCSUploader]
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=8192)
+def _resolved_key(path: Path) -> str:
+    """
+    上传缓存键（解析后的绝对路径）
+    
+    resolve() 会逐级访问文件系统，同一次运行中的图片路径不会变化，只解析一次
+    """
+    return str(path.resolve())
+
+
 class RateLimiter:
     """请求速率限制器 - 10秒20个请求"""
     
@@ -114,17 +125,47 @@ class GenerationEngine:
         self._uploaded_urls: Dict[str, str] = {}  # 路径 -> URL映射
         self._uploaded_moss_ids: Dict[str, str] = {}  # 路径 -> moss_id映射
         self._upload_lock = threading.Lock()  # 上传缓存锁
+        self._product_info: Optional[Dict[str, Any]] = None  # 文案生成用产品信息（每次运行计算一次）
         
         # 速率限制器（仅 KieAI 需要）
         self._rate_limiter = RateLimiter()  # 使用默认值：10秒20个请求
         self._use_rate_limiter = True  # 是否启用速率限制
         
         # 全局并发限制：最多100个同时进行的任务（组内+组外总和）
-        self._concurrent_semaphore = threading.Semaphore(100)
+        self._max_concurrent = 100
+        self._concurrent_semaphore = threading.Semaphore(self._max_concurrent)
+        
+        # 图片生成线程池（所有组共用，延迟创建）
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         
         # 生成日志锁
         self._log_lock = threading.Lock()
     
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取共用的图片生成线程池（线程安全，首次使用时创建）"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_concurrent,
+                    thread_name_prefix="gen",
+                )
+            return self._executor
+    
+    def close(self):
+        """关闭共用线程池并释放上传器、图片生成客户端、文案生成器资源（再次使用时会重新创建）"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.moss_uploader.close()
+        # OpenRouter 客户端持有后台事件循环和连接池，其他客户端无需关闭
+        api_close = getattr(self.api_client, "close", None)
+        if api_close is not None:
+            api_close()
+        if self.text_generator:
+            self.text_generator.close()
+    
     def _get_generation_flags(self) -> Tuple[bool, bool]:
         """
         获取生成目标标志
@@ -137,6 +178,41 @@ class GenerationEngine:
         should_generate_text = generation_target in ('text', 'both')
         return should_generate_images, should_generate_text
 
+    def _build_product_info(self) -> Dict[str, Any]:
+        """
+        构建文案生成用的产品信息（模板配置在运行期间不变，每次运行只需计算一次）
+        
+        Returns:
+            产品信息字典
+        """
+        template_cfg = self._template_config
+        text_gen_cfg = template_cfg.text_generation
+        
+        # 优先从 text_generation.product_info 读取，向后兼容 template_variables
+        if text_gen_cfg and text_gen_cfg.product_info:
+            product_info_source = text_gen_cfg.product_info
+        else:
+            product_info_source = template_cfg.template_variables
+        
+        return {
+            "product_name": product_info_source.get("product_name", template_cfg.name),
+            "brand": product_info_source.get("brand", ""),
+            "category": product_info_source.get("category", "美妆"),
+            "style": product_info_source.get("style", "种草分享"),
+            "features": product_info_source.get("features", ""),
+            "target_audience": product_info_source.get("target_audience", "年轻女性"),
+        }
+    
+    def _get_product_info(self) -> Dict[str, Any]:
+        """
+        获取文案生成用的产品信息（run() 开始时已计算；直接调用 run_group 时按需计算并缓存）
+        
+        Returns:
+            产品信息字典
+        """
+        if self._product_info is None:
+            self._product_info = self._build_product_info()
+        return self._product_info
     
     def _load_configs(self):
         """加载配置"""
@@ -163,25 +239,31 @@ class GenerationEngine:
             # MOSS: 保持原有路径
             return f"/ai_image_generator/{name}/"
     
-    def _upload_images(self, paths: List[Path]) -> List[str]:
+    def _upload_images(self, paths: List[Path], refresh_cached: bool = False) -> List[str]:
         """
         上传图片并返回URL列表（线程安全）
         
+        刚上传的图片返回的已是新签发的URL，无需再次刷新；
+        只有命中缓存的图片才可能需要刷新（防止过期）。
+        
         Args:
             paths: 图片路径列表
+            refresh_cached: 是否刷新命中缓存的图片URL
             
         Returns:
             URL列表
         """
         urls = []
+        cached_positions = []  # 命中缓存的 (urls 下标, key)
         folder = self._get_upload_folder()
         
         for path in paths:
-            key = str(path.resolve())
+            key = _resolved_key(path)
             
             with self._upload_lock:
                 # 检查缓存
                 if key in self._uploaded_urls:
+                    cached_positions.append((len(urls), key))
                     urls.append(self._uploaded_urls[key])
                     continue
                 
@@ -193,27 +275,16 @@ class GenerationEngine:
                     self._uploaded_moss_ids[key] = result.moss_id
                     urls.append(result.url)
         
-        return urls
-    
-    def _refresh_urls(self, paths: List[Path]) -> List[str]:
-        """刷新URL（防止过期，线程安全）"""
-        with self._upload_lock:
-            moss_ids = []
-            for path in paths:
-                key = str(path.resolve())
-                if key in self._uploaded_moss_ids:
-                    moss_ids.append(self._uploaded_moss_ids[key])
-            
-            if moss_ids:
+        # 刷新命中缓存的URL（一次批量请求）
+        if refresh_cached and cached_positions:
+            with self._upload_lock:
+                moss_ids = [self._uploaded_moss_ids[key] for _, key in cached_positions]
                 new_urls = self.moss_uploader.refresh_urls_sync(moss_ids)
-                # 更新缓存
-                for i, path in enumerate(paths):
-                    if i < len(new_urls):
-                        key = str(path.resolve())
-                        self._uploaded_urls[key] = new_urls[i]
-                return new_urls
-            
-            return []
+                for (pos, key), url in zip(cached_positions, new_urls):
+                    self._uploaded_urls[key] = url
+                    urls[pos] = url
+        
+        return urls
     
     def _upload_images_no_cache(self, paths: List[Path]) -> List[str]:
         """上传图片（不使用缓存，用于刷新）"""
@@ -473,6 +544,7 @@ class GenerationEngine:
         
         template_cfg = self._template_config
         paths = self.config_manager.get_all_resolved_paths()
+        self._product_info = self._build_product_info()
         
         # 获取生成目标配置
         should_generate_images, should_generate_text = self._get_generation_flags()
@@ -792,21 +864,25 @@ class GenerationEngine:
         
         # 并发执行组
         group_results = []
-        with ThreadPoolExecutor(max_workers=max_concurrent_groups) as executor:
-            futures = {executor.submit(execute_group, g): g for g in pending_groups}
-            
-            for future in as_completed(futures):
-                group_info = futures[future]
-                group_num = group_info["group_index"] + 1
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrent_groups) as executor:
+                futures = {executor.submit(execute_group, g): g for g in pending_groups}
                 
-                try:
-                    result = future.result()
-                    if result:
-                        with self._log_lock:
-                            generation_log.groups.append(result.to_dict())
-                        group_results.append(result)
-                except Exception as e:
-                    logger.error(f"[组{group_num}] ❌ 执行异常: {e}")
+                for future in as_completed(futures):
+                    group_info = futures[future]
+                    group_num = group_info["group_index"] + 1
+                    
+                    try:
+                        result = future.result()
+                        if result:
+                            with self._log_lock:
+                                generation_log.groups.append(result.to_dict())
+                            group_results.append(result)
+                    except Exception as e:
+                        logger.error(f"[组{group_num}] ❌ 执行异常: {e}")
+        finally:
+            # 所有组执行完毕，释放共用的图片生成线程池
+            self.close()
         
         # 完成
         duration = time.time() - start_time
@@ -973,6 +1049,17 @@ class GenerationEngine:
             actual_images_count = len(group_tasks)
             logger.info(f"{log_prefix} 📋 本组将生成 {actual_images_count} 张图片")
             
+            # 组内共享的模板上下文（每张图片只覆盖随图片变化的字段）
+            group_context = self.template_engine.build_context(
+                group_index=group_index,
+                image_index=0,
+                product_count=1,
+                reference_count=0,
+                total_groups=template_cfg.group_count,
+                mode=template_cfg.mode,
+                custom_vars=template_cfg.template_variables,
+            )
+            
             # 准备所有生成任务
             for image_index, (prod_img, ref_img) in enumerate(group_tasks):
                 image_num = image_index + 1
@@ -981,28 +1068,17 @@ class GenerationEngine:
                 if ref_img:
                     all_selected_references.append(ref_img)
                 
-                # 上传图片
+                # 上传图片（新上传的URL已是最新，只刷新命中缓存的URL）
                 images_to_upload = [prod_img]
                 if ref_img:
                     images_to_upload.append(ref_img)
-                image_urls = self._upload_images(images_to_upload)
-                
-                # 刷新URL
-                fresh_urls = self._refresh_urls(images_to_upload)
-                
-                # 构建模板上下文
-                context = self.template_engine.build_context(
-                    group_index=group_index,
-                    image_index=image_index,
-                    product_count=1,
-                    reference_count=1 if ref_img else 0,
-                    total_groups=template_cfg.group_count,
-                    mode=template_cfg.mode,
-                    custom_vars=template_cfg.template_variables,
-                )
+                fresh_urls = self._upload_images(images_to_upload, refresh_cached=True)
                 
                 # 渲染Prompt
-                rendered_prompt = self.template_engine.render(prompt_template, context)
+                rendered_prompt = self.template_engine.render_dict(
+                    prompt_template,
+                    group_context.for_image(image_index, reference_count=1 if ref_img else 0),
+                )
                 
                 # 输出路径
                 output_path = self.output_manager.get_output_path(
@@ -1044,16 +1120,8 @@ class GenerationEngine:
                 if text_gen_cfg and text_gen_cfg.enabled:
                     logger.info(f"{log_prefix} 📝 开始生成文案...")
                     try:
-                        # 优先从 text_generation.product_info 读取，向后兼容 template_variables
-                        product_info_source = text_gen_cfg.product_info if text_gen_cfg.product_info else template_cfg.template_variables
-                        product_info = {
-                            "product_name": product_info_source.get("product_name", template_cfg.name),
-                            "brand": product_info_source.get("brand", ""),
-                            "category": product_info_source.get("category", "美妆"),
-                            "style": product_info_source.get("style", "种草分享"),
-                            "features": product_info_source.get("features", ""),
-                            "target_audience": product_info_source.get("target_audience", "年轻女性"),
-                        }
+                        # 产品信息在 run() 开始时已预先计算
+                        product_info = self._get_product_info()
                         
                         # 将 opening_styles 转换为字典列表传递
                         opening_styles = None
@@ -1201,7 +1269,8 @@ class GenerationEngine:
         Returns:
             图片结果列表
         """
-        results = {}
+        # 结果按 image_index 预分配（索引连续 0..N-1，无需字典 + 排序）
+        results: List[Optional[ImageResult]] = [None] * len(tasks)
         images_count = len(tasks)
         log_prefix = f"[组{group_num}]"
         
@@ -1232,9 +1301,9 @@ class GenerationEngine:
                         self._rate_limiter.acquire()
                     
                     if attempt == 0:
-                        logger.info(f"{task_log_prefix} 🎨 开始生成...")
+                        logger.info("%s 🎨 开始生成...", task_log_prefix)
                     else:
-                        logger.info(f"{task_log_prefix} 🔄 重试 {attempt}/{max_retries}...")
+                        logger.info("%s 🔄 重试 %d/%d...", task_log_prefix, attempt, max_retries)
                     
                     try:
                         result = self.api_client.generate_image(
@@ -1252,9 +1321,9 @@ class GenerationEngine:
                                 all_images_output_path.parent.mkdir(parents=True, exist_ok=True)
                                 shutil.copy2(output_path, all_images_output_path)
                             except Exception as copy_err:
-                                logger.warning(f"{task_log_prefix} ⚠️ 写入 All_images 失败: {copy_err}")
+                                logger.warning("%s ⚠️ 写入 All_images 失败: %s", task_log_prefix, copy_err)
                         
-                        logger.info(f"{task_log_prefix} ✅ 完成")
+                        logger.info("%s ✅ 完成", task_log_prefix)
                         
                         return image_index, ImageResult(
                             index=image_index,
@@ -1290,11 +1359,11 @@ class GenerationEngine:
                             # 参考：https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
                             delay = min(retry_delay_max, random.uniform(retry_delay_base, last_delay * 3))
                             last_delay = delay
-                            logger.warning(f"{task_log_prefix} ⚠️ 失败: {e}，{delay:.1f}秒后重试...")
+                            logger.warning("%s ⚠️ 失败: %s，%.1f秒后重试...", task_log_prefix, e, delay)
                             time.sleep(delay)
                             continue
                         else:
-                            logger.error(f"{task_log_prefix} ❌ 失败: {e}")
+                            logger.error("%s ❌ 失败: %s", task_log_prefix, e)
                             break
                 
                 # 所有重试都失败
@@ -1311,30 +1380,28 @@ class GenerationEngine:
                 # 释放全局并发许可
                 self._concurrent_semaphore.release()
         
-        # 使用线程池并发执行
-        # 组内不限制并发数，由全局信号量控制总并发（最多100个同时进行的任务）
-        max_workers = len(tasks)
+        # 使用所有组共用的线程池并发执行
+        # 线程池大小等于全局并发上限，由全局信号量控制总并发（最多100个同时进行的任务）
+        executor = self._get_executor()
+        futures = {executor.submit(generate_single, task): task for task in tasks}
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(generate_single, task): task for task in tasks}
-            
-            for future in as_completed(futures):
-                try:
-                    image_index, result = future.result()
-                    results[image_index] = result
-                except Exception as e:
-                    task = futures[future]
-                    logger.error(f"{log_prefix} ❌ 任务异常: {e}")
-                    results[task["image_index"]] = ImageResult(
-                        index=task["image_index"],
-                        output_path=task["output_path"],
-                        task_id="",
-                        prompt=task["prompt"],
-                        input_images=task["image_urls"],
-                        success=False,
-                        error=str(e),
-                    )
+        for future in as_completed(futures):
+            try:
+                image_index, result = future.result()
+                results[image_index] = result
+            except Exception as e:
+                task = futures[future]
+                logger.error("%s ❌ 任务异常: %s", log_prefix, e)
+                results[task["image_index"]] = ImageResult(
+                    index=task["image_index"],
+                    output_path=task["output_path"],
+                    task_id="",
+                    prompt=task["prompt"],
+                    input_images=task["image_urls"],
+                    success=False,
+                    error=str(e),
+                )
         
-        # 按索引排序返回
-        return [results[i] for i in sorted(results.keys())]
+        # 每个任务恰好产生一个结果，所有槽位均已填充
+        return results
     
\ No newline at end of file
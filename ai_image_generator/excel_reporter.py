@@ -3,11 +3,39 @@ Excel 报告生成器 - 生成图片统计报告
 """
 
 import logging
+import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# 报告中展示的生成图片扩展名（小写）
+_IMG_EXTS = frozenset({'.png', '.jpg', '.jpeg'})
+
+
+def _is_output_image(entry_name: str) -> bool:
+    """判断是否为生成的图片（01.png, 02.png 等，扩展名不区分大小写），排除参考图"""
+    return os.path.splitext(entry_name)[1].lower() in _IMG_EXTS and '参考图' not in entry_name
+
+
+def _list_output_images(group_dir: Path) -> List[Path]:
+    """
+    列出组目录下的生成图片（按文件名排序）
+    
+    Args:
+        group_dir: 组目录
+        
+    Returns:
+        图片路径列表
+    """
+    with os.scandir(group_dir) as it:
+        images = [
+            Path(entry.path) for entry in it
+            if _is_output_image(entry.name) and entry.is_file()
+        ]
+    images.sort(key=lambda x: x.name)
+    return images
+
 
 def generate_excel_report(
     run_dir: Path,
@@ -100,17 +128,9 @@ def generate_excel_report(
                 pass
             return None
         
-        # 先遍历一遍，计算最大图片数量（用于合并表头和设置列宽）
-        max_images_count = 0
-        for group_dir in group_dirs:
-            images_count = 0
-            for img_file in group_dir.iterdir():
-                if img_file.is_file():
-                    suffix = img_file.suffix.lower()
-                    name = img_file.name.lower()
-                    if suffix in ('.png', '.jpg', '.jpeg') and '参考图' not in name:
-                        images_count += 1
-            max_images_count = max(max_images_count, images_count)
+        # 先遍历一遍，收集各组图片并计算最大图片数量（用于合并表头和设置列宽）
+        group_images = {group_dir: _list_output_images(group_dir) for group_dir in group_dirs}
+        max_images_count = max(len(images) for images in group_images.values())
         
         # 设置所有图片列的统一宽度
         for col in range(1, max_images_count + 1):
@@ -128,17 +148,8 @@ def generate_excel_report(
             group_num = group_dir.name
             worksheet.write(current_row, 0, f"组 {group_num}", cell_format)
             
-            # 获取该组的所有生成图片（排除参考图）
-            images = []
-            for img_file in group_dir.iterdir():
-                if img_file.is_file():
-                    suffix = img_file.suffix.lower()
-                    name = img_file.name.lower()
-                    # 只包含生成的图片（01.png, 02.png 等），排除参考图
-                    if suffix in ('.png', '.jpg', '.jpeg') and '参考图' not in name:
-                        images.append(img_file)
-            
-            images.sort(key=lambda x: x.name)
+            # 该组的所有生成图片（排除参考图）
+            images = group_images[group_dir]
             
             current_col = 1
             for image_file in images:
@@ -2,15 +2,30 @@
 自定义异常类
 """
 
+import copyreg
+
 
 class GeneratorError(Exception):
-    """生成器基础异常"""
-    pass
+    """生成器基础异常（子类属性使用 __slots__ 存储，避免每个实例分配 __dict__）"""
+    
+    __slots__ = ()
+    
+    def __reduce__(self):
+        # __slots__ 属性不在 __dict__ 中，需显式保存才能被 pickle（如跨进程传递异常）
+        state = {
+            name: getattr(self, name, None)
+            for klass in type(self).__mro__
+            for name in getattr(klass, "__slots__", ())
+        }
+        # 通过 __new__ 重建，避免再次调用 __init__ 改写 message
+        return copyreg.__newobj__, (type(self), *self.args), state or None
 
 
 class ConfigurationError(GeneratorError):
     """配置错误"""
     
+    __slots__ = ('field',)
+    
     def __init__(self, message: str, field: str = None):
         self.field = field
         super().__init__(message)
@@ -19,6 +34,8 @@ class ConfigurationError(GeneratorError):
 class TemplateRenderError(GeneratorError):
     """模板渲染错误"""
     
+    __slots__ = ('template',)
+    
     def __init__(self, message: str, template: str = None):
         self.template = template
         super().__init__(message)
@@ -27,6 +44,8 @@ class TemplateRenderError(GeneratorError):
 class PathNotFoundError(GeneratorError):
     """路径不存在错误"""
     
+    __slots__ = ('path',)
+    
     def __init__(self, path: str, message: str = None):
         self.path = path
         msg = message or f"路径不存在: {path}"
@@ -36,6 +55,8 @@ class PathNotFoundError(GeneratorError):
 class APIError(GeneratorError):
     """API调用错误"""
     
+    __slots__ = ('task_id', 'status_code')
+    
     def __init__(self, message: str, task_id: str = None, status_code: int = None):
         self.task_id = task_id
         self.status_code = status_code
@@ -45,6 +66,8 @@ class APIError(GeneratorError):
 class MOSSError(GeneratorError):
     """MOSS存储错误"""
     
+    __slots__ = ('moss_id',)
+    
     def __init__(self, message: str, moss_id: str = None):
         self.moss_id = moss_id
         super().__init__(message)
@@ -53,6 +76,8 @@ class MOSSError(GeneratorError):
 class SelectionError(GeneratorError):
     """选择错误"""
     
+    __slots__ = ('available', 'requested')
+    
     def __init__(self, message: str, available: int = None, requested: int = None):
         self.available = available
         self.requested = requested
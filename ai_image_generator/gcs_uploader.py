@@ -7,10 +7,16 @@ Google Cloud Storage 上传器 - 负责图片上传和 URL 管理
    或者在 config.json 中配置 credentials_path
 """
 
+import functools
+import io
 import logging
+import mimetypes
+import os
 import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -19,6 +25,102 @@ from .models import UploadResult
 
 logger = logging.getLogger(__name__)
 
+# 单文件上传的分片大小（必须是 256 KiB 的整数倍）；不超过该大小的文件一次请求完成上传
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 单次 batch 请求可合并的最大操作数（GCS 限制为 100）
+DELETE_BATCH_SIZE = 100
+
+# 需要转换为 JPG 再上传的格式
+HEIC_EXTENSIONS = {".heic", ".heif"}
+
+
+# 共享客户端创建锁
+_shared_client_lock = threading.Lock()
+
+# pillow-heif 解码器是否已注册（进程内只需注册一次）
+_heif_opener_registered = False
+
+
+def _register_heif_opener():
+    """注册 pillow-heif 解码器（未安装时抛出 ImportError）"""
+    global _heif_opener_registered
+    if not _heif_opener_registered:
+        import pillow_heif
+        
+        pillow_heif.register_heif_opener()
+        _heif_opener_registered = True
+
+
+def _configure_http_pool(client, pool_maxsize: int):
+    """
+    为 GCS 客户端安装更大的 HTTP 连接池
+    
+    默认的 requests 连接池只有 10 条连接，并发上传时会频繁新建/丢弃连接。
+    传输层不做重试：GCS 库自身按请求类型重试（条件上传 if_generation_match 视为幂等），
+    在此叠加 urllib3 重试会重复发送可续传上传的分块，并抛出上层无法识别的 RetryError。
+    
+    Args:
+        client: storage.Client 实例
+        pool_maxsize: 连接池大小
+    """
+    try:
+        from requests.adapters import HTTPAdapter
+        
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        client._http.mount("https://", adapter)
+    except Exception as e:
+        # 连接池只是性能优化，失败时使用默认配置
+        logger.debug(f"配置 GCS 连接池失败，使用默认配置: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_shared_client(
+    credentials_path: Optional[str],
+    project_id: Optional[str],
+    api_endpoint: Optional[str],
+    pool_maxsize: int,
+):
+    """
+    创建 GCS 客户端（进程内按配置缓存，避免重复建立 HTTP 会话和刷新认证）
+    
+    Args:
+        credentials_path: 服务账号 JSON 文件路径
+        project_id: GCP 项目 ID
+        api_endpoint: 自定义 API 端点
+        pool_maxsize: HTTP 连接池大小
+        
+    Returns:
+        storage.Client 实例
+    """
+    try:
+        from google.cloud import storage
+        
+        client_kwargs = {}
+        if api_endpoint:
+            client_kwargs["client_options"] = {"api_endpoint": api_endpoint}
+        
+        if credentials_path:
+            client = storage.Client.from_service_account_json(
+                credentials_path, **client_kwargs
+            )
+        elif project_id:
+            # 使用默认凭证 + 指定项目 ID
+            client = storage.Client(project=project_id, **client_kwargs)
+        else:
+            # 使用默认凭证（GOOGLE_APPLICATION_CREDENTIALS 环境变量）
+            client = storage.Client(**client_kwargs)
+        
+        _configure_http_pool(client, pool_maxsize)
+        return client
+        
+    except ImportError:
+        raise MOSSError(
+            "无法导入 google-cloud-storage 模块，请运行: pip install google-cloud-storage"
+        )
+    except Exception as e:
+        raise MOSSError(f"初始化 GCS 客户端失败: {e}")
+
 
 class GCSUploader:
     """Google Cloud Storage 上传器"""
@@ -31,6 +133,9 @@ class GCSUploader:
         project_id: Optional[str] = None,
         make_public: bool = True,
         url_expiration_hours: int = 24,
+        max_concurrency: int = 8,
+        pool_maxsize: Optional[int] = None,
+        api_endpoint: Optional[str] = None,
     ):
         """
         初始化上传器
@@ -42,6 +147,9 @@ class GCSUploader:
             project_id: GCP 项目 ID（可选）
             make_public: 是否将上传的文件设为公开访问（需要 bucket 未启用统一访问控制）
             url_expiration_hours: 签名 URL 过期时间（小时）
+            max_concurrency: 批量上传的最大并发数
+            pool_maxsize: HTTP 连接池大小（默认按 max_concurrency 计算）
+            api_endpoint: 自定义 API 端点（如就近的区域端点，可选）
         """
         self.bucket_name = bucket_name
         self.folder_path = folder_path.strip("/")
@@ -49,106 +157,117 @@ class GCSUploader:
         self.project_id = project_id
         self.make_public = make_public
         self.url_expiration_hours = url_expiration_hours
+        self.max_concurrency = max(1, max_concurrency)
+        # 连接池需容纳所有并发上传线程（分片上传时每个线程各占一条连接）
+        self.pool_maxsize = pool_maxsize or max(10, self.max_concurrency * 2)
+        self.api_endpoint = api_endpoint
         
         # URL 缓存: path -> (url, blob_name)
         self._cache: Dict[str, Tuple[str, str]] = {}
+        self._cache_lock = threading.Lock()
         
         # GCS 客户端（延迟初始化）
         self._client = None
         self._bucket = None
+        self._client_lock = threading.Lock()
     
     def _get_client(self):
-        """获取 GCS 客户端"""
-        if self._client is None:
-            try:
-                from google.cloud import storage
-                
-                if self.credentials_path:
-                    self._client = storage.Client.from_service_account_json(
-                        self.credentials_path
+        """获取 GCS 客户端（线程安全，同一进程内相同配置共用一个客户端）"""
+        with self._client_lock:
+            if self._client is None:
+                with _shared_client_lock:
+                    self._client = _get_shared_client(
+                        self.credentials_path,
+                        self.project_id,
+                        self.api_endpoint,
+                        self.pool_maxsize,
                     )
-                elif self.project_id:
-                    # 使用默认凭证 + 指定项目 ID
-                    self._client = storage.Client(project=self.project_id)
-                else:
-                    # 使用默认凭证（GOOGLE_APPLICATION_CREDENTIALS 环境变量）
-                    self._client = storage.Client()
-                
                 self._bucket = self._client.bucket(self.bucket_name)
-                
-            except ImportError:
-                raise MOSSError(
-                    "无法导入 google-cloud-storage 模块，请运行: pip install google-cloud-storage"
-                )
-            except Exception as e:
-                raise MOSSError(f"初始化 GCS 客户端失败: {e}")
-        
-        return self._client, self._bucket
+            return self._client, self._bucket
     
-    def _convert_heic_to_jpg(self, heic_path: Path, output_dir: Path) -> Path:
+    def close(self):
+        """释放本实例持有的客户端引用（共享的客户端及其 HTTP 会话保持可用）"""
+        with self._client_lock:
+            self._client = None
+            self._bucket = None
+    
+    def _convert_heic_to_jpg(self, heic_path: Path) -> bytes:
         """
         将 HEIC/HEIF 转换为 JPG
         
+        优先在进程内使用 pillow-heif 解码并直接编码到内存，
+        失败时再回退到 sips / ImageMagick 子进程（需要临时文件）。
+        
         Args:
             heic_path: HEIC 文件路径
-            output_dir: 输出目录
             
         Returns:
-            转换后的 JPG 文件路径
+            JPG 图片字节
         """
-        out_name = heic_path.stem + ".jpg"
-        out_path = output_dir / out_name
-        
-        try:
-            # 尝试使用 sips（macOS）
-            subprocess.run(
-                ["sips", "-s", "format", "jpeg", str(heic_path), "--out", str(out_path)],
-                check=True,
-                capture_output=True,
-            )
-            return out_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-        
+        pillow_error: Optional[Exception] = None
         try:
-            # 尝试使用 ImageMagick
-            subprocess.run(
-                ["convert", str(heic_path), str(out_path)],
-                check=True,
-                capture_output=True,
-            )
-            return out_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
+            # 优先使用 pillow-heif（进程内解码，无需启动子进程和临时文件）
+            from PIL import Image
+            
+            _register_heif_opener()
+            buffer = io.BytesIO()
+            with Image.open(heic_path) as img:
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                img.save(buffer, "JPEG", quality=95)
+            return buffer.getvalue()
+        except ImportError as e:
+            pillow_error = e
+        except Exception as e:
+            pillow_error = e
+            logger.debug(f"pillow-heif 转换失败，尝试命令行工具: {heic_path}, {e}")
         
+        temp_dir = Path(tempfile.mkdtemp(prefix="gcs_upload_"))
         try:
-            # 尝试使用 pillow-heif
-            from PIL import Image
-            import pillow_heif
+            out_path = temp_dir / (heic_path.stem + ".jpg")
             
-            pillow_heif.register_heif_opener()
-            img = Image.open(heic_path)
-            img.save(out_path, "JPEG", quality=95)
-            return out_path
-        except ImportError:
+            try:
+                # 尝试使用 sips（macOS）
+                subprocess.run(
+                    ["sips", "-s", "format", "jpeg", str(heic_path), "--out", str(out_path)],
+                    check=True,
+                    capture_output=True,
+                )
+                return out_path.read_bytes()
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                pass
+            
+            try:
+                # 尝试使用 ImageMagick
+                subprocess.run(
+                    ["convert", str(heic_path), str(out_path)],
+                    check=True,
+                    capture_output=True,
+                )
+                return out_path.read_bytes()
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                pass
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        if isinstance(pillow_error, ImportError):
             raise MOSSError(f"无法转换 HEIC 文件，请安装 pillow-heif: {heic_path}")
-        except Exception as e:
-            raise MOSSError(f"HEIC 转换失败: {heic_path}, {e}")
+        raise MOSSError(f"HEIC 转换失败: {heic_path}, {pillow_error}")
     
-    def _prepare_image(self, path: Path, temp_dir: Path) -> Path:
+    def _prepare_image(self, path: Path) -> Tuple[str, Optional[bytes], Optional[str]]:
         """
         准备图片用于上传（如需要则转换格式）
         
         Args:
             path: 原始图片路径
-            temp_dir: 临时目录
             
         Returns:
-            准备好的图片路径
+            (上传文件名, 转换后的图片字节, content_type)；
+            无需转换时后两项为 None，直接上传原文件
         """
-        if path.suffix.lower() in {".heic", ".heif"}:
-            return self._convert_heic_to_jpg(path, temp_dir)
-        return path
+        if path.suffix.lower() in HEIC_EXTENSIONS:
+            return path.stem + ".jpg", self._convert_heic_to_jpg(path), "image/jpeg"
+        return path.name, None, None
     
     def get_cached_url(self, path: Path) -> Optional[str]:
         """
@@ -160,14 +279,16 @@ class GCSUploader:
         Returns:
             缓存的 URL，如果没有返回 None
         """
-        key = str(path.resolve())
-        if key in self._cache:
-            return self._cache[key][0]
+        key = os.path.abspath(path)
+        cached = self._cache.get(key)
+        if cached:
+            return cached[0]
         return None
     
     def clear_cache(self):
         """清除 URL 缓存"""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
     
     def upload_image(self, path: Path, folder: Optional[str] = None) -> UploadResult:
         """
@@ -180,59 +301,75 @@ class GCSUploader:
         Returns:
             UploadResult: 包含 url 和 blob_name
         """
-        # 检查内存缓存
-        cache_key = str(path.resolve())
-        if cache_key in self._cache:
-            url, blob_name = self._cache[cache_key]
+        # 检查内存缓存（abspath 只做字符串规范化，不像 resolve() 那样逐级访问文件系统）
+        cache_key = os.path.abspath(path)
+        cached = self._cache.get(cache_key)
+        if cached:
+            url, blob_name = cached
             logger.debug(f"使用缓存 URL: {path.name}")
             return UploadResult(path=path, url=url, moss_id=blob_name)
         
-        # 准备图片（转换 HEIC 等）
-        temp_dir = Path(tempfile.mkdtemp(prefix="gcs_upload_"))
+        # 准备图片（HEIC 等格式在内存中转换为 JPG）
+        upload_name, data, content_type = self._prepare_image(path)
+        
+        # 获取客户端
+        _, bucket = self._get_client()
+        
+        # 构建 blob 路径
+        target_folder = folder.strip("/") if folder else self.folder_path
+        blob_name = f"{target_folder}/{upload_name}"
+        
+        from google.api_core.exceptions import PreconditionFailed
+        
+        # 上传文件（if_generation_match=0：仅当对象不存在时写入，省去单独的 exists() 请求）
+        blob = bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
         try:
-            upload_path = self._prepare_image(path, temp_dir)
-            
-            # 获取客户端
-            _, bucket = self._get_client()
-            
-            # 构建 blob 路径
-            target_folder = folder.strip("/") if folder else self.folder_path
-            blob_name = f"{target_folder}/{upload_path.name}"
-            
-            # 检查文件是否已存在于 bucket 中
-            blob = bucket.blob(blob_name)
-            if blob.exists():
-                # 文件已存在，直接返回公开 URL
-                url = blob.public_url
-                self._cache[cache_key] = (url, blob_name)
-                logger.info(f"文件已存在，跳过上传: {path.name}")
-                return UploadResult(path=path, url=url, moss_id=blob_name)
-            
-            # 上传文件
-            blob.upload_from_filename(str(upload_path))
-            
-            # 获取 URL
-            # 尝试设为公开访问，如果失败则直接使用 public_url
-            # （bucket 已设置为公开访问时，不需要单独设置每个对象）
-            try:
-                if self.make_public:
-                    blob.make_public()
-            except Exception as e:
-                # bucket 启用了统一访问控制，无法设置单个对象的 ACL
-                # 但如果 bucket 已设置公开访问，public_url 仍然可用
-                logger.debug(f"无法设置单个对象公开访问（bucket 可能已公开）: {e}")
-            
-            # 使用公开 URL
+            if data is not None:
+                blob.upload_from_string(data, content_type=content_type, if_generation_match=0)
+            else:
+                with open(path, "rb") as fh:
+                    blob.upload_from_file(
+                        fh,
+                        size=os.fstat(fh.fileno()).st_size,
+                        content_type=mimetypes.guess_type(path.name)[0],
+                        if_generation_match=0,
+                    )
+        except PreconditionFailed:
+            # 文件已存在，直接返回公开 URL
             url = blob.public_url
-            
-            # 缓存结果
-            self._cache[cache_key] = (url, blob_name)
-            
-            logger.info(f"上传成功: {path.name} -> {blob_name}")
+            with self._cache_lock:
+                self._cache[cache_key] = (url, blob_name)
+            logger.info(f"文件已存在，跳过上传: {path.name}")
             return UploadResult(path=path, url=url, moss_id=blob_name)
         
-        finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        # 获取 URL
+        self._try_make_public(blob)
+        
+        # 使用公开 URL
+        url = blob.public_url
+        
+        # 缓存结果
+        with self._cache_lock:
+            self._cache[cache_key] = (url, blob_name)
+        
+        logger.info(f"上传成功: {path.name} -> {blob_name}")
+        return UploadResult(path=path, url=url, moss_id=blob_name)
+    
+    def _try_make_public(self, blob):
+        """
+        尝试将对象设为公开访问，失败时忽略（直接使用 public_url）
+        
+        Args:
+            blob: GCS blob 对象
+        """
+        # bucket 已设置为公开访问时，不需要单独设置每个对象
+        try:
+            if self.make_public:
+                blob.make_public()
+        except Exception as e:
+            # bucket 启用了统一访问控制，无法设置单个对象的 ACL
+            # 但如果 bucket 已设置公开访问，public_url 仍然可用
+            logger.debug(f"无法设置单个对象公开访问（bucket 可能已公开）: {e}")
     
     def _generate_signed_url(self, blob) -> str:
         """
@@ -267,12 +404,105 @@ class GCSUploader:
             folder: 自定义文件夹路径（可选）
             
         Returns:
-            上传结果列表
+            上传结果列表（与 paths 顺序一致）
+        """
+        if len(paths) <= 1:
+            return [self.upload_image(path, folder) for path in paths]
+        
+        # 先在主线程初始化客户端，避免多个线程同时创建
+        self._get_client()
+        
+        try:
+            from google.cloud.storage import transfer_manager
+        except ImportError:
+            # 旧版 google-cloud-storage 没有 transfer_manager
+            transfer_manager = None
+        
+        if transfer_manager is not None:
+            return self._upload_batch_with_transfer_manager(paths, folder, transfer_manager)
+        
+        # GCS 没有批量上传接口，使用有界线程池并发上传（网络 I/O 期间释放 GIL）
+        max_workers = min(self.max_concurrency, len(paths))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gcs_upload") as executor:
+            # executor.map 按输入顺序返回结果
+            return list(executor.map(lambda p: self.upload_image(p, folder), paths))
+    
+    def _upload_batch_with_transfer_manager(
+        self,
+        paths: List[Path],
+        folder: Optional[str],
+        transfer_manager,
+    ) -> List[UploadResult]:
         """
+        使用 transfer_manager 批量上传
+        
+        - 已缓存的图片直接返回
+        - HEIC 转换等准备工作在线程池中并发执行
+        - 所有文件通过 upload_many 并发上传，skip_if_exists（if_generation_match=0）
+          代替逐个 exists() 检查，已存在的对象以 PreconditionFailed 返回
+        
+        Args:
+            paths: 图片路径列表
+            folder: 自定义文件夹路径（可选）
+            transfer_manager: google.cloud.storage.transfer_manager 模块
+            
+        Returns:
+            上传结果列表（与 paths 顺序一致）
+        """
+        from google.api_core.exceptions import PreconditionFailed
+        
+        _, bucket = self._get_client()
+        target_folder = folder.strip("/") if folder else self.folder_path
+        
+        cache_keys = [os.path.abspath(path) for path in paths]
+        
+        # 未缓存的图片（同一文件只上传一次）
+        pending: Dict[str, Path] = {}
+        for path, cache_key in zip(paths, cache_keys):
+            if cache_key not in pending and not self._cache.get(cache_key):
+                pending[cache_key] = path
+        
+        blobs = {}
+        if pending:
+            # 准备图片（HEIC 在内存中转换）放到线程池并发执行
+            max_workers = min(self.max_concurrency, len(pending))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gcs_prepare") as executor:
+                prepared = list(executor.map(self._prepare_image, pending.values()))
+            
+            uploads = []  # (cache_key, 文件路径或内存文件, upload_name)
+            for (cache_key, path), (upload_name, data, content_type) in zip(pending.items(), prepared):
+                # 设置 chunk_size：大文件按分片走可续传上传
+                blob = bucket.blob(f"{target_folder}/{upload_name}", chunk_size=UPLOAD_CHUNK_SIZE)
+                if content_type:
+                    blob.content_type = content_type
+                blobs[cache_key] = blob
+                uploads.append((cache_key, io.BytesIO(data) if data is not None else str(path), upload_name))
+            
+            upload_results = transfer_manager.upload_many(
+                [(source, blobs[cache_key]) for cache_key, source, _ in uploads],
+                skip_if_exists=True,
+                max_workers=self.max_concurrency,
+                worker_type=transfer_manager.THREAD,
+            )
+            for (cache_key, _, upload_name), upload_result in zip(uploads, upload_results):
+                blob = blobs[cache_key]
+                if isinstance(upload_result, PreconditionFailed):
+                    # 文件已存在（skip_if_exists），直接使用公开 URL
+                    logger.info(f"文件已存在，跳过上传: {upload_name}")
+                elif isinstance(upload_result, Exception):
+                    raise MOSSError(f"上传失败: {upload_name}, {upload_result}")
+                else:
+                    self._try_make_public(blob)
+                    logger.info(f"上传成功: {upload_name} -> {blob.name}")
+        
+        with self._cache_lock:
+            for cache_key, blob in blobs.items():
+                self._cache[cache_key] = (blob.public_url, blob.name)
+        
         results = []
-        for path in paths:
-            result = self.upload_image(path, folder)
-            results.append(result)
+        for path, cache_key in zip(paths, cache_keys):
+            url, blob_name = self._cache[cache_key]
+            results.append(UploadResult(path=path, url=url, moss_id=blob_name))
         return results
     
     def upload_batch_sync(
@@ -304,11 +534,8 @@ class GCSUploader:
         Returns:
             URL 列表
         """
-        urls = []
-        for blob_name in blob_names:
-            url = f"https://storage.googleapis.com/{self.bucket_name}/{blob_name}"
-            urls.append(url)
-        return urls
+        prefix = f"https://storage.googleapis.com/{self.bucket_name}/"
+        return [prefix + blob_name for blob_name in blob_names]
     
     def delete_blob(self, blob_name: str) -> bool:
         """
@@ -329,3 +556,36 @@ class GCSUploader:
         except Exception as e:
             logger.error(f"删除失败: {blob_name}, {e}")
             return False
+    
+    def delete_batch(self, blob_names: List[str]) -> List[bool]:
+        """
+        批量删除文件
+        
+        使用 GCS JSON API 的 batch 请求，每 DELETE_BATCH_SIZE 个删除操作合并为一次 HTTP 请求；
+        某一批失败（如其中有对象不存在）时，该批回退为逐个删除以得到各自的结果。
+        
+        Args:
+            blob_names: blob 名称列表
+            
+        Returns:
+            每个 blob 是否删除成功（与 blob_names 顺序一致）
+        """
+        if not blob_names:
+            return []
+        
+        client, bucket = self._get_client()
+        results: List[bool] = []
+        for start in range(0, len(blob_names), DELETE_BATCH_SIZE):
+            chunk = blob_names[start:start + DELETE_BATCH_SIZE]
+            try:
+                with client.batch():
+                    for blob_name in chunk:
+                        bucket.blob(blob_name).delete()
+            except Exception as e:
+                logger.debug(f"批量删除失败，逐个重试: {e}")
+                results.extend(self.delete_blob(blob_name) for blob_name in chunk)
+                continue
+            
+            logger.info(f"批量删除成功: {len(chunk)} 个文件")
+            results.extend([True] * len(chunk))
+        return results
@@ -2,49 +2,77 @@
 图片选择器 - 负责图片和Prompt的选择
 """
 
+import functools
 import json
 import logging
+import os
 import random
 import re
+import sys
+from collections import deque
+from collections.abc import Hashable
+from itertools import compress
 from pathlib import Path
-from typing import List, Optional, Set, Tuple, TypeVar, Union
+from typing import Dict, List, Optional, Set, Tuple, TypeVar, Union
 
 from .exceptions import SelectionError
+from .json_utils import load_json_file
 from .models import PromptItem, SelectionMode
 
 logger = logging.getLogger(__name__)
 
 
+# 自然排序用的数字分段正则（模块级预编译）
+_SPLIT_RE = re.compile(r'(\d+)')
+
+
 def natural_sort_key(path: Path) -> List:
     """
     自然排序键函数，让数字按数值大小排序
     与 macOS Finder 默认排序方式一致
     例如: 1, 2, 3, 10, 11 而不是 1, 10, 11, 2, 3
     """
-    def convert(text):
-        return int(text) if text.isdigit() else text.lower()
-    
-    return [convert(c) for c in re.split(r'(\d+)', path.name)]
+    return [int(c) if c.isdigit() else c.lower() for c in _SPLIT_RE.split(path.name)]
 
 
 def get_finder_sort_order(directory: Path) -> Optional[List[str]]:
     """
     尝试从 .DS_Store 读取 Finder 的自定义排序顺序
     
+    解析结果按 (路径, 修改时间) 缓存，.DS_Store 未变化时不会重复解析
+    
     Args:
         directory: 目录路径
         
     Returns:
         文件名列表（按 Finder 排序），如果无法读取返回 None
     """
-    ds_store_path = directory / ".DS_Store"
-    if not ds_store_path.exists():
+    ds_store_path = os.path.join(directory, ".DS_Store")
+    try:
+        mtime_ns = os.stat(ds_store_path).st_mtime_ns
+    except OSError:
         return None
     
+    order = _read_finder_sort_order(ds_store_path, mtime_ns)
+    return list(order) if order is not None else None
+
+
+@functools.lru_cache(maxsize=128)
+def _read_finder_sort_order(ds_store_path: str, mtime_ns: int) -> Optional[Tuple[str, ...]]:
+    """
+    解析 .DS_Store 中的文件图标位置并排序
+    
+    Args:
+        ds_store_path: .DS_Store 文件路径
+        mtime_ns: 文件修改时间（仅作为缓存键，文件变化后自动失效）
+        
+    Returns:
+        文件名元组（按 Finder 排序），如果无法读取返回 None
+    """
     try:
         from ds_store import DSStore
         
-        with DSStore.open(str(ds_store_path), 'r') as d:
+        with DSStore.open(ds_store_path, 'r') as d:
             # 收集所有有 Iloc（图标位置）的文件
             iloc_entries = {}
             for e in d:
@@ -54,7 +82,7 @@ def get_finder_sort_order(directory: Path) -> Optional[List[str]]:
             if len(iloc_entries) > 1:
                 # 按 y 坐标排序（从上到下），然后按 x 坐标（从左到右）
                 sorted_files = sorted(iloc_entries.items(), key=lambda x: (x[1][1], x[1][0]))
-                return [name for name, _ in sorted_files]
+                return tuple(name for name, _ in sorted_files)
     except ImportError:
         logger.debug("ds-store 库未安装，使用自然排序")
     except Exception as e:
@@ -64,11 +92,28 @@ def get_finder_sort_order(directory: Path) -> Optional[List[str]]:
 
 T = TypeVar("T")
 
+# 已使用标记翻转表：0（未使用）-> 1，其余 -> 0，配合 itertools.compress 过滤剩余图片
+_UNUSED_TABLE = bytes([1]) + bytes(255)
+
 # 支持的图片格式
-SUPPORTED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".heic", ".heif"}
+SUPPORTED_IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".heic", ".heif"})
+# 供 str.endswith 使用的后缀元组
+_IMG_SUFFIX_TUPLE = tuple(SUPPORTED_IMAGE_EXTENSIONS)
 
 # 支持的Prompt文件格式
-SUPPORTED_PROMPT_EXTENSIONS = {".j2", ".txt", ".md"}
+SUPPORTED_PROMPT_EXTENSIONS = frozenset({".j2", ".txt", ".md"})
+_PROMPT_SUFFIX_TUPLE = tuple(SUPPORTED_PROMPT_EXTENSIONS)
+
+
+class _IndexedPromptList(list):
+    """附带 id -> 位置 索引的 PromptItem 列表（仍可按普通 list 使用）"""
+
+    def build_index(self):
+        """构建 id 索引（重复 id 时保留靠前的位置）"""
+        by_id: Dict[str, int] = {}
+        for i, prompt in enumerate(self):
+            by_id.setdefault(sys.intern(prompt.id), i)
+        self.by_id = by_id
 
 
 class ImageSelector:
@@ -78,10 +123,84 @@ class ImageSelector:
         """初始化选择器"""
         # 已使用的图片集合（用于不重复选择）
         self._used_images: Set[str] = set()
+        # 绑定的图片列表（语料），以及按位置记录已使用状态的标记（每张图片 1 字节，1 表示已使用）
+        # 绑定的图片列表对象（按身份识别）及其快照、长度
+        self._corpus_src: Optional[List[Path]] = None
+        self._corpus: Tuple[Path, ...] = ()
+        self._corpus_keys: List[str] = []
+        # 路径字符串 -> 位置列表（同一路径在列表中重复出现时需要同时标记）
+        self._corpus_index: Dict[str, List[int]] = {}
+        # id(Path) -> 位置，语料中的 Path 对象可直接取到已缓存的路径字符串
+        self._corpus_ids: Dict[int, int] = {}
+        # 文件名 -> 首次出现的位置（首次查找时构建）
+        self._corpus_names: Optional[Dict[str, int]] = None
+        self._used_mask = bytearray()
+        self._unused_count = 0
+    
+    def set_corpus(self, images: List[Path]):
+        """
+        绑定图片列表，之后针对该列表的选择/统计直接查标记数组，不再逐个 str()
+        
+        已使用记录（_used_images）始终保留，标记数组由其派生，重新绑定不会丢失状态；
+        原地修改已绑定的列表（长度不变）后需再次调用本方法
+        
+        Args:
+            images: 图片列表（通常为 list_images 的结果）
+        """
+        # 路径字符串只计算一次并驻留，后续集合/字典查找多为指针比较
+        keys = [sys.intern(str(img)) for img in images]
+        mask = bytearray(len(keys))
+        used = self._used_images
+        if used:
+            for i, key in enumerate(keys):
+                if key in used:
+                    mask[i] = 1
+        
+        self._corpus_src = images
+        self._corpus = tuple(images)
+        self._corpus_keys = keys
+        index: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            index.setdefault(key, []).append(i)
+        self._corpus_index = index
+        self._corpus_ids = {id(img): i for i, img in enumerate(images)}
+        self._corpus_names = None
+        self._used_mask = mask
+        self._unused_count = mask.count(0)
+    
+    def _bind(self, images: List[Path]):
+        """
+        确保 images 为当前绑定的语料（同一列表对象且长度未变时不做任何工作）
+        
+        只比较身份和长度，为 O(1)；长度不变的原地修改需显式调用 set_corpus
+        """
+        if images is not self._corpus_src or len(images) != len(self._corpus):
+            self.set_corpus(images)
+    
+    def _key_of(self, image: Path) -> str:
+        """
+        获取图片的路径字符串
+        
+        语料中的 Path 对象直接返回绑定时缓存的字符串，其余情况才调用 str() 并驻留
+        """
+        i = self._corpus_ids.get(id(image))
+        if i is not None and self._corpus[i] is image:
+            return self._corpus_keys[i]
+        return sys.intern(str(image))
+    
+    def _mark_used(self, key: str):
+        """标记路径字符串为已使用，并同步标记数组"""
+        self._used_images.add(key)
+        for i in self._corpus_index.get(key, ()):
+            if not self._used_mask[i]:
+                self._used_mask[i] = 1
+                self._unused_count -= 1
     
     def reset_used_images(self):
         """重置已使用图片记录"""
         self._used_images.clear()
+        self._used_mask = bytearray(len(self._used_mask))
+        self._unused_count = len(self._used_mask)
     
     def validate_specified_images(
         self,
@@ -103,24 +222,30 @@ class ImageSelector:
         """
         errors = []
         valid_images = []
+        valid_set: Set[str] = set()
         seen = set()
+        # 查找表只构建一次，所有指定项共用
+        by_full, by_name = self._path_lookup(available_images)
         
         for spec in specified:
             # 检查重复
+            spec = sys.intern(spec)
             if spec in seen:
                 errors.append(f"指定图片重复: {spec}")
                 continue
             seen.add(spec)
             
             # 查找图片
-            found = self.find_image_by_path(available_images, spec)
+            found = self._lookup_image(by_full, by_name, spec)
             if not found:
                 errors.append(f"找不到指定的图片: {spec}")
             else:
                 # 检查是否已经添加过（不同路径指向同一文件）
-                if str(found) in [str(v) for v in valid_images]:
+                found_key = self._key_of(found)
+                if found_key in valid_set:
                     errors.append(f"指定图片重复（不同路径指向同一文件）: {spec}")
                 else:
+                    valid_set.add(found_key)
                     valid_images.append(found)
         
         return valid_images, errors
@@ -140,37 +265,57 @@ class ImageSelector:
         Returns:
             选中的图片，如果没有可用的返回None
         """
-        # 如果有must_include且未使用过，优先返回
-        if must_include and str(must_include) not in self._used_images:
-            self._used_images.add(str(must_include))
-            return must_include
+        self._bind(images)
         
-        # 过滤出未使用的图片
-        available = [img for img in images if str(img) not in self._used_images]
+        # 如果有must_include且未使用过，优先返回
+        if must_include:
+            key = self._key_of(must_include)
+            if key not in self._used_images:
+                self._mark_used(key)
+                return must_include
         
-        if not available:
+        if self._unused_count == 0:
             return None
         
-        # 随机选择一张
-        selected = random.choice(available)
-        self._used_images.add(str(selected))
-        return selected
+        n = len(images)
+        mask = self._used_mask
+        if self._unused_count * 2 > n:
+            # 未使用的图片过半：按下标拒绝采样，期望不超过 2 次即可命中，无需构建候选列表
+            while True:
+                i = random.randrange(n)
+                if not mask[i]:
+                    break
+        else:
+            # 剩余较少时，一次性构建未使用下标列表再随机选择
+            i = random.choice(list(compress(range(n), mask.translate(_UNUSED_TABLE))))
+        
+        self._mark_used(self._corpus_keys[i])
+        return images[i]
     
     def mark_image_used(self, image: Path):
         """标记图片为已使用"""
-        self._used_images.add(str(image))
+        self._mark_used(self._key_of(image))
     
     def is_image_used(self, image: Path) -> bool:
         """检查图片是否已使用"""
-        return str(image) in self._used_images
+        return self._key_of(image) in self._used_images
     
     def get_remaining_images_count(self, images: List[Path]) -> int:
         """获取剩余可用图片数量"""
-        return len([img for img in images if str(img) not in self._used_images])
+        self._bind(images)
+        return self._unused_count
     
     def get_remaining_images(self, images: List[Path]) -> List[Path]:
-        """获取剩余可用图片列表"""
-        return [img for img in images if str(img) not in self._used_images]
+        """获取剩余可用图片列表（保持原有顺序）"""
+        self._bind(images)
+        # 借助未使用计数直接处理全部可用/全部用完的情况
+        unused = self._unused_count
+        if unused == len(images):
+            return list(images)
+        if unused == 0:
+            return []
+        # 翻转标记后用 compress 在 C 层完成过滤
+        return list(compress(images, self._used_mask.translate(_UNUSED_TABLE)))
     
     def list_images(self, directory: Path) -> List[Path]:
         """
@@ -191,22 +336,21 @@ class ImageSelector:
         
         images = []
         
-        def scan_directory(dir_path: Path):
-            """递归扫描目录"""
-            for p in dir_path.iterdir():
-                # 忽略隐藏文件和文件夹
-                if p.name.startswith("."):
-                    continue
-                
-                if p.is_dir():
-                    # 递归扫描子文件夹
-                    scan_directory(p)
-                elif p.is_file():
-                    # 检查扩展名
-                    if p.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
-                        images.append(p)
-        
-        scan_directory(directory)
+        # 使用 os.scandir + 显式栈遍历子文件夹，复用目录项缓存的类型信息
+        stack = deque([str(directory)])
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # 忽略隐藏文件和文件夹
+                    if entry.name.startswith("."):
+                        continue
+                    
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        # 检查扩展名
+                        if entry.name.lower().endswith(_IMG_SUFFIX_TUPLE):
+                            images.append(Path(entry.path))
         
         # 尝试从 .DS_Store 获取 Finder 排序
         finder_order = get_finder_sort_order(directory)
@@ -252,36 +396,79 @@ class ImageSelector:
             raise SelectionError(f"Prompt 配置文件不存在: {json_path}")
 
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            items = self._read_enabled_prompt_items(json_path)
+        except SelectionError:
+            raise
         except json.JSONDecodeError as e:
             raise SelectionError(f"Prompt 配置文件格式错误: {e}")
         except Exception as e:
             raise SelectionError(f"读取 Prompt 配置文件失败: {e}")
 
-        if "prompts" not in data:
-            raise SelectionError(f"Prompt 配置文件缺少 'prompts' 字段: {json_path}")
-
-        # 解析并过滤 enabled=true 的 prompts
-        prompts = []
-        for item in data["prompts"]:
+        # 解析 prompts（禁用项已在读取时跳过）
+        # id/name/tags 在目录中大量重复，驻留后所有条目共享同一份字符串
+        intern = sys.intern
+        prompts = _IndexedPromptList()
+        for item in items:
             try:
-                prompt = PromptItem(
-                    id=item["id"],
-                    name=item.get("name") or item["id"],
+                # 先转为字符串再驻留（JSON 中的 id 可能是数字，sys.intern 只接受 str）
+                prompt_id = intern(str(item["id"]))
+                prompts.append(PromptItem(
+                    id=prompt_id,
+                    name=intern(str(item.get("name") or prompt_id)),
                     description=item.get("description", ""),
-                    enabled=item.get("enabled", True),
-                    tags=item.get("tags", []),
+                    enabled=True,
+                    tags=tuple(intern(str(tag)) for tag in item.get("tags") or ()),
                     template=item["template"],
-                )
-                # 只返回启用的 prompts
-                if prompt.enabled:
-                    prompts.append(prompt)
+                ))
             except KeyError as e:
                 raise SelectionError(f"Prompt 配置项缺少必需字段 {e}: {item}")
+            except TypeError:
+                raise SelectionError(f"Prompt 配置项的 tags 必须是列表: {item}")
 
+        prompts.build_index()
         return prompts
 
+    def _read_enabled_prompt_items(self, json_path: Path) -> List[dict]:
+        """
+        读取 prompts 数组中启用的条目
+
+        安装了 ijson 时流式解析，禁用的条目不会整体保留在内存中；
+        未安装或没有读到任何启用条目时，回退到完整解析（优先 orjson）
+
+        Args:
+            json_path: Prompt JSON 文件路径
+
+        Returns:
+            enabled 不为 false 的原始条目列表
+
+        Raises:
+            SelectionError: 如果 JSON 格式错误或缺少 'prompts' 字段
+        """
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+
+        if ijson is not None:
+            try:
+                with open(json_path, "rb") as f:
+                    items = [
+                        item for item in ijson.items(f, "prompts.item")
+                        if item.get("enabled", True)
+                    ]
+            except ijson.JSONError as e:
+                raise SelectionError(f"Prompt 配置文件格式错误: {e}")
+            if items:
+                return items
+            # 没有读到启用的条目（可能为空列表或缺少 prompts 字段），由完整解析给出准确结果
+
+        data = load_json_file(json_path)
+
+        if "prompts" not in data:
+            raise SelectionError(f"Prompt 配置文件缺少 'prompts' 字段: {json_path}")
+
+        return [item for item in data["prompts"] if item.get("enabled", True)]
+
     def find_prompt_by_id(self, prompts: List[PromptItem], prompt_id: str) -> Optional[PromptItem]:
         """
         根据 ID 查找 Prompt
@@ -293,6 +480,13 @@ class ImageSelector:
         Returns:
             找到的 Prompt，未找到返回 None
         """
+        # load_prompts_from_json 返回的列表带有 id 索引，校验位置后直接返回
+        by_id = getattr(prompts, "by_id", None)
+        if by_id is not None:
+            pos = by_id.get(prompt_id)
+            if pos is not None and pos < len(prompts) and prompts[pos].id == prompt_id:
+                return prompts[pos]
+
         for prompt in prompts:
             if prompt.id == prompt_id:
                 return prompt
@@ -311,18 +505,18 @@ class ImageSelector:
         if not directory.exists() or not directory.is_dir():
             return []
 
-        prompts = []
-        for p in sorted(directory.iterdir()):
-            if not p.is_file():
-                continue
-            # 忽略隐藏文件
-            if p.name.startswith("."):
-                continue
-            # 检查扩展名
-            if p.suffix.lower() in SUPPORTED_PROMPT_EXTENSIONS:
-                prompts.append(p)
+        # os.scandir 的目录项自带文件类型，先按名称过滤再判断类型，只为命中的文件构建 Path
+        with os.scandir(directory) as it:
+            entries = [
+                entry for entry in it
+                # 忽略隐藏文件，检查扩展名
+                if not entry.name.startswith(".")
+                and entry.name.lower().endswith(_PROMPT_SUFFIX_TUPLE)
+                and entry.is_file()
+            ]
+        entries.sort(key=lambda entry: entry.name)
 
-        return prompts
+        return [Path(entry.path) for entry in entries]
     
     def _parse_count(self, count: Union[int, List[int], Tuple[int, int]]) -> int:
         """
@@ -342,6 +536,35 @@ class ImageSelector:
         else:
             return int(count)
     
+    def _ensure_included(
+        self,
+        result: List[T],
+        must_include: Optional[T],
+        actual_count: int,
+        result_keys: Optional[Set] = None,
+    ):
+        """
+        确保结果中包含 must_include（超出数量时替换最后一项）
+        
+        Args:
+            result: 已选择的项目列表（原地修改）
+            must_include: 必须包含的项目
+            actual_count: 选择数量
+            result_keys: result 对应的集合（可选，提供时用于 O(1) 成员检查）
+        """
+        if not must_include:
+            return
+        if result_keys is not None:
+            present = must_include in result_keys
+        else:
+            present = must_include in result
+        if present:
+            return
+        if len(result) >= actual_count:
+            result[-1] = must_include
+        else:
+            result.append(must_include)
+    
     def select_items(
         self,
         items: List[T],
@@ -375,21 +598,26 @@ class ImageSelector:
             
             # 将指定的字符串转换为实际项目
             result = []
+            # must_include 可哈希时同步维护集合，成员检查为 O(1)
+            result_keys: Optional[Set] = set() if isinstance(must_include, Hashable) else None
+            # 查找表只构建一次（逆序构建，重复时保留靠前的项目）
+            by_name = {item.name: item for item in reversed(items) if hasattr(item, "name")}
+            by_str = {str(item): item for item in reversed(items)}
             for spec in specified[:actual_count]:
-                for item in items:
-                    if hasattr(item, "name") and item.name == spec:
-                        result.append(item)
-                        break
-                    elif str(item) == spec or (hasattr(item, "__fspath__") and str(item).endswith(spec)):
-                        result.append(item)
-                        break
+                item = by_name.get(spec) or by_str.get(spec)
+                if item is None:
+                    # 路径后缀匹配，仅在字典未命中时按原列表顺序扫描
+                    item = next(
+                        (v for k, v in reversed(by_str.items()) if hasattr(v, "__fspath__") and k.endswith(spec)),
+                        None,
+                    )
+                if item is not None:
+                    result.append(item)
+                    if result_keys is not None:
+                        result_keys.add(item)
             
             # 确保包含must_include
-            if must_include and must_include not in result:
-                if len(result) >= actual_count:
-                    result[-1] = must_include
-                else:
-                    result.append(must_include)
+            self._ensure_included(result, must_include, actual_count, result_keys)
             
             return result
         
@@ -398,11 +626,7 @@ class ImageSelector:
             result = items[:actual_count]
             
             # 确保包含must_include
-            if must_include and must_include not in result:
-                if len(result) >= actual_count:
-                    result[-1] = must_include
-                else:
-                    result.append(must_include)
+            self._ensure_included(result, must_include, actual_count)
             
             return result
         
@@ -450,26 +674,25 @@ class ImageSelector:
         if not prompts:
             return None
         
-        # 优先选择未使用过的
-        unused = [p for p in prompts if str(p) not in used_prompts]
+        # 路径字符串只计算一次；按列表顺序（按路径去重）保证固定随机种子下结果可复现
+        index = {sys.intern(str(p)): p for p in prompts}
         
+        # 优先选择未使用过的
+        unused = [k for k in index if k not in used_prompts]
         if unused:
             # 如果有上一个prompt，确保不选择相同的
-            if previous_prompt:
-                different = [p for p in unused if str(p) != previous_prompt]
-                if different:
-                    return random.choice(different)
-            return random.choice(unused)
+            different = [k for k in unused if k != previous_prompt]
+            return index[random.choice(different or unused)]
         
         # 所有prompt都用过了，需要复用
         # 但确保与上一组不同
-        if previous_prompt and len(prompts) > 1:
-            different = [p for p in prompts if str(p) != previous_prompt]
+        if previous_prompt and len(index) > 1:
+            different = [k for k in index if k != previous_prompt]
             if different:
-                return random.choice(different)
+                return index[random.choice(different)]
         
         # 只有一个prompt或没有上一个，随机选择
-        return random.choice(prompts)
+        return random.choice(list(index.values()))
     
     def select_prompts_for_groups(
         self,
@@ -491,24 +714,33 @@ class ImageSelector:
         if not prompts:
             return [None] * group_count
         
-        result = []
-        used_prompts: Set[str] = set()
-        previous_prompt: Optional[str] = None
-        
-        for i in range(group_count):
-            if unique_per_group:
-                selected = self.select_unique_prompt(prompts, used_prompts, previous_prompt)
-            else:
-                # 不要求唯一，但仍确保相邻组不同
-                selected = self.select_unique_prompt(prompts, set(), previous_prompt)
-            
-            if selected:
-                result.append(selected)
-                used_prompts.add(str(selected))
-                previous_prompt = str(selected)
-            else:
-                result.append(prompts[0] if prompts else None)
-        
+        # 按路径去重（保持原有顺序）
+        pool = list({sys.intern(str(p)): p for p in prompts}.values())
+        n = len(pool)
+        if n == 1:
+            return [pool[0]] * group_count
+        
+        order: List[int] = []
+        if unique_per_group:
+            # 逐轮拼接随机排列：每轮内各不相同，轮与轮衔接处若与上一组相同则与本轮随机一项交换
+            while len(order) < group_count:
+                perm = random.sample(range(n), n)
+                if order and perm[0] == order[-1]:
+                    j = random.randrange(1, n)
+                    perm[0], perm[j] = perm[j], perm[0]
+                order.extend(perm)
+            del order[group_count:]
+        else:
+            # 不要求唯一，但仍确保相邻组不同：从除上一组外的 n-1 个下标中均匀抽取
+            previous = -1
+            for _ in range(group_count):
+                i = random.randrange(n - 1 if previous >= 0 else n)
+                if 0 <= previous <= i:
+                    i += 1
+                order.append(i)
+                previous = i
+        
+        result = [pool[i] for i in order]
         return result
     
     def find_image_by_path(self, images: List[Path], target_path: str) -> Optional[Path]:
@@ -522,17 +754,62 @@ class ImageSelector:
         Returns:
             找到的图片路径，未找到返回None
         """
-        target = Path(target_path)
+        by_full, by_name = self._path_lookup(images)
+        return self._lookup_image(by_full, by_name, target_path)
+    
+    def _lookup_image(
+        self,
+        by_full: Dict[str, List[int]],
+        by_name: Dict[str, int],
+        target_path: str,
+    ) -> Optional[Path]:
+        """
+        在预先构建的查找表中查找图片
         
-        for img in images:
-            # 完整路径匹配
-            if img == target or str(img) == target_path:
-                return img
-            # 文件名匹配
-            if img.name == target.name:
-                return img
-            # 相对路径匹配
-            if str(img).endswith(target_path):
-                return img
+        与逐个遍历的语义一致：返回列表中第一张满足任一条件（完整路径、文件名、
+        路径后缀）的图片，查找表只用来确定扫描的上界
         
+        Args:
+            by_full: 完整路径 -> 位置列表（_path_lookup 的结果）
+            by_name: 文件名 -> 首次出现的位置
+            target_path: 目标路径（可以是完整路径或文件名）
+            
+        Returns:
+            找到的图片路径，未找到返回None
+        """
+        target = Path(target_path)
+        keys = self._corpus_keys
+        
+        # 完整路径 / 文件名匹配的最靠前位置
+        best = len(keys)
+        for positions in (by_full.get(target_path), by_full.get(str(target))):
+            if positions:
+                best = min(best, positions[0])
+        best = min(best, by_name.get(target.name, best))
+        
+        # 更靠前的图片可能以路径后缀命中，只需扫描 best 之前的部分
+        for i in range(best):
+            if keys[i].endswith(target_path):
+                return self._corpus[i]
+        if best < len(keys):
+            return self._corpus[best]
         return None
+    
+    def _path_lookup(self, images: List[Path]) -> Tuple[Dict[str, List[int]], Dict[str, int]]:
+        """
+        获取图片查找表（随绑定的图片列表缓存，重复查找不再重建）
+        
+        Args:
+            images: 图片列表
+            
+        Returns:
+            (完整路径 -> 位置列表, 文件名 -> 首次出现的位置)
+        """
+        self._bind(images)
+        if self._corpus_names is None:
+            # 逆序构建，使重名时列表中靠前的位置覆盖靠后的
+            n = len(images)
+            self._corpus_names = {
+                img.name: n - 1 - i for i, img in enumerate(reversed(images))
+            }
+        return self._corpus_index, self._corpus_names
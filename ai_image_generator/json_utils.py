@@ -0,0 +1,85 @@
+"""
+JSON 工具 - 优先使用 orjson（可选依赖），未安装时回退到标准库 json
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def dump_json_file(data: Any, path: Path, indent: bool = True):
+    """
+    将数据写入 JSON 文件（UTF-8，不转义中文）
+
+    Args:
+        data: 可序列化的数据
+        path: 输出文件路径
+        indent: 是否缩进（2 空格）
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        Path(path).write_bytes(orjson.dumps(data, option=option))
+        return
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2 if indent else None)
+
+
+def load_json_file(path: Path) -> Any:
+    """
+    读取 JSON 文件（UTF-8）
+
+    Args:
+        path: JSON 文件路径
+
+    Returns:
+        解析结果
+
+    Raises:
+        json.JSONDecodeError: 格式错误（orjson.JSONDecodeError 是其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """
+    序列化为紧凑的 JSON 字节（UTF-8，不转义中文）
+
+    Args:
+        data: 可序列化的数据
+
+    Returns:
+        JSON 字节
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    解析 JSON 文本或字节
+
+    Args:
+        data: JSON 字符串或字节
+
+    Returns:
+        解析结果
+
+    Raises:
+        json.JSONDecodeError: 格式错误（orjson.JSONDecodeError 是其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
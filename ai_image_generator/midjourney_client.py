@@ -9,13 +9,18 @@ API 文档: https://kie.ai/model-preview/features/mj-api
 
 import json
 import logging
+import random
+import shutil
 import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .exceptions import APIError
+from .json_utils import dumps_bytes, loads
 from .models import TaskResult
 
 logger = logging.getLogger(__name__)
@@ -25,9 +30,14 @@ MJ_ASPECT_RATIOS = {
     "1:1", "4:3", "3:4", "16:9", "9:16", "2:3", "3:2", "4:5", "5:4", "21:9", "9:21"
 }
 
+# 合法值 -> 自身，校验与取默认值合并为一次 dict.get
+_VALID_ASPECT_RATIOS = {r: r for r in MJ_ASPECT_RATIOS}
+
 # Midjourney 支持的版本
 MJ_VERSIONS = {"7", "6.1", "6", "5.2", "5.1", "niji6", "niji7"}
 
+_VALID_VERSIONS = {v: v for v in MJ_VERSIONS}
+
 # 速度选项映射（用户友好名称 -> API 值）
 MJ_SPEED_MAP = {
     "relax": "relaxed",
@@ -36,6 +46,12 @@ MJ_SPEED_MAP = {
     "turbo": "turbo",
 }
 
+# 结果中可能包含图片URL的字段（按优先级）
+_RESULT_URL_KEYS = ("resultUrls", "urls", "images", "result_urls")
+
+# 下载结果图片时的拷贝缓冲区大小
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
 # 默认值
 DEFAULT_MJ_VERSION = "7"
 DEFAULT_MJ_SPEED = "fast"
@@ -52,6 +68,8 @@ class MidjourneyClient:
         speed: str = "fast",
         poll_interval: float = 5.0,
         max_wait: float = 600.0,
+        max_poll_interval: float = 15.0,
+        pool_maxsize: int = 64,
     ):
         """
         初始化 Midjourney API 客户端
@@ -61,22 +79,47 @@ class MidjourneyClient:
             base_url: API基础URL
             version: Midjourney 版本 (7, 6.1, 6, 5.2, 5.1, niji6, niji7)
             speed: 生成速度 (relaxed, fast, turbo)
-            poll_interval: 轮询间隔（秒）
+            poll_interval: 初始轮询间隔（秒），之后按指数退避逐步增大
             max_wait: 最大等待时间（秒）
+            max_poll_interval: 轮询间隔上限（秒）
+            pool_maxsize: HTTP 连接池大小（并发生成时每个任务各占一条连接）
         """
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
-        self.version = version if version in MJ_VERSIONS else DEFAULT_MJ_VERSION
+        self.version = _VALID_VERSIONS.get(version, DEFAULT_MJ_VERSION)
         # 标准化速度参数
         self.speed = MJ_SPEED_MAP.get(speed.lower(), DEFAULT_MJ_SPEED)
         self.poll_interval = poll_interval
         self.max_wait = max_wait
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        
+        # 每个任务都相同的请求字段预先序列化（不含外层花括号），create_task 只编码变化的字段
+        self._static_payload = dumps_bytes({
+            "taskType": "mj_img2img",
+            "version": self.version,
+            "speed": self.speed,
+            "waterMark": "",  # 水印，留空
+        })[1:-1]
         
         self.session = requests.Session()
         self.session.headers.update({
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         })
+        # 默认连接池只有 10 条连接，并发任务多时会反复建立 TLS 连接；
+        # 查询/下载等幂等请求遇到 429/5xx 时自动退避重试（POST 创建任务不重试）
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def create_task(
         self,
@@ -105,35 +148,43 @@ class MidjourneyClient:
         url = f"{self.base_url}/mj/generate"
         
         # 验证宽高比
-        if aspect_ratio not in MJ_ASPECT_RATIOS:
+        valid_aspect_ratio = _VALID_ASPECT_RATIOS.get(aspect_ratio)
+        if valid_aspect_ratio is None:
             logger.warning(f"不支持的宽高比 {aspect_ratio}，使用默认值 1:1")
-            aspect_ratio = "1:1"
+            valid_aspect_ratio = "1:1"
+        aspect_ratio = valid_aspect_ratio
         
+        # 与预序列化的固定字段 (taskType/version/speed/waterMark) 拼接成完整请求体
         payload = {
-            "taskType": "mj_img2img",
             "prompt": prompt,
             "fileUrls": image_urls,  # 数组格式
             "aspectRatio": aspect_ratio,
-            "version": self.version,
-            "speed": self.speed,
             "stylization": max(0, min(1000, stylization)),
             "weirdness": max(0, min(3000, weirdness)),
             "variety": max(0, min(100, variety)),
-            "waterMark": "",  # 水印，留空
         }
+        body = b"".join((
+            b"{",
+            self._static_payload,
+            b",",
+            dumps_bytes(payload)[1:-1],
+            b"}",
+        ))
         
         logger.debug(f"创建 Midjourney 任务: prompt长度={len(prompt)}, 图片数={len(image_urls)}, aspect_ratio={aspect_ratio}")
-        logger.debug(f"Midjourney 请求 payload: {json.dumps(payload, ensure_ascii=False)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Midjourney 请求 payload: {body.decode('utf-8')}")
         
         try:
-            response = self.session.post(url, json=payload, timeout=30)
+            response = self.session.post(url, data=body, timeout=30)
             
             logger.debug(f"API响应状态码: {response.status_code}")
-            logger.debug(f"API响应内容: {response.text[:500]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"API响应内容: {response.text[:500]}")
             
             response.raise_for_status()
             
-            data = response.json()
+            data = loads(response.content)
             
             if data.get("code") != 200:
                 error_msg = data.get("message") or data.get("msg") or data.get("error") or f"错误码: {data.get('code')}"
@@ -154,6 +205,8 @@ class MidjourneyClient:
         except requests.RequestException as e:
             logger.error(f"API请求异常: {e}")
             raise APIError(f"API请求失败: {e}")
+        except json.JSONDecodeError as e:
+            raise APIError(f"API响应解析失败: {e}")
     
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """
@@ -171,7 +224,7 @@ class MidjourneyClient:
             response = self.session.get(url, params={"taskId": task_id}, timeout=30)
             response.raise_for_status()
             
-            data = response.json()
+            data = loads(response.content)
             
             if data.get("code") != 200:
                 raise APIError(
@@ -184,6 +237,8 @@ class MidjourneyClient:
         
         except requests.RequestException as e:
             raise APIError(f"API请求失败: {e}", task_id=task_id)
+        except json.JSONDecodeError as e:
+            raise APIError(f"API响应解析失败: {e}", task_id=task_id)
 
     def wait_for_result(self, task_id: str, log_prefix: str = "") -> TaskResult:
         """
@@ -198,6 +253,7 @@ class MidjourneyClient:
         """
         start_time = time.time()
         last_log_time = 0
+        attempt = 0
         
         while True:
             elapsed = time.time() - start_time
@@ -215,7 +271,7 @@ class MidjourneyClient:
                 result_info = status_data.get("resultInfoJson", {})
                 if isinstance(result_info, str):
                     try:
-                        result_info = json.loads(result_info)
+                        result_info = loads(result_info)
                     except json.JSONDecodeError:
                         result_info = {}
                 
@@ -249,57 +305,76 @@ class MidjourneyClient:
                 if current_time >= last_log_time + 10:
                     logger.info(f"{log_prefix} ⏳ Midjourney 生成中... {current_time}秒")
                     last_log_time = current_time
-                time.sleep(self.poll_interval)
+                # 指数退避 + 随机抖动：任务通常需要 30~120 秒，前期密集轮询意义不大
+                delay = min(self.max_poll_interval, self.poll_interval * (1.5 ** attempt))
+                attempt += 1
+                time.sleep(delay + random.uniform(0, 0.5))
     
     def _parse_result_urls(self, result_info: Any) -> List[str]:
-        """解析结果URL"""
-        urls = []
+        """
+        解析结果URL
         
-        if isinstance(result_info, dict):
-            # 标准格式: {"resultUrls": [{"resultUrl": "..."}, ...]}
-            result_urls = result_info.get("resultUrls", [])
-            if isinstance(result_urls, list):
-                for item in result_urls:
+        标准格式: {"resultUrls": [{"resultUrl": "..."}, ...]}，
+        其次依次尝试备用字段 urls / images / result_urls，取第一个非空结果
+        """
+        # JSON 字符串（可能被多次编码）逐层解码，不使用递归
+        while isinstance(result_info, str):
+            try:
+                result_info = loads(result_info)
+            except json.JSONDecodeError:
+                return [result_info] if result_info.startswith("http") else []
+        
+        if isinstance(result_info, list):
+            return [str(u) for u in result_info if u]
+        if not isinstance(result_info, dict):
+            return []
+        
+        for key in _RESULT_URL_KEYS:
+            val = result_info.get(key)
+            if not val:
+                continue
+            if isinstance(val, str):
+                # resultUrls 只接受列表格式
+                if key == "resultUrls":
+                    continue
+                return [val]
+            if not isinstance(val, list):
+                continue
+            if key == "resultUrls":
+                # 逐项判断类型：字典取 resultUrl，字符串直接使用（允许混合列表）
+                urls = []
+                for item in val:
                     if isinstance(item, dict):
                         url = item.get("resultUrl")
                         if url:
                             urls.append(url)
                     elif isinstance(item, str):
                         urls.append(item)
-            
-            # 备用字段
-            for key in ["urls", "images", "result_urls"]:
-                if key in result_info and not urls:
-                    val = result_info[key]
-                    if isinstance(val, list):
-                        urls.extend([str(u) for u in val if u])
-                    elif isinstance(val, str):
-                        urls.append(val)
-        
-        elif isinstance(result_info, list):
-            urls.extend([str(u) for u in result_info if u])
-        
-        elif isinstance(result_info, str):
-            try:
-                parsed = json.loads(result_info)
-                return self._parse_result_urls(parsed)
-            except json.JSONDecodeError:
-                if result_info.startswith("http"):
-                    urls.append(result_info)
+            else:
+                urls = [str(u) for u in val if u]
+            if urls:
+                return urls
         
-        return urls
+        return []
     
     def download_result(self, url: str, output_path: Path) -> Path:
         """下载结果图片"""
         try:
-            response = requests.get(url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # 复用 session 的连接池；结果图片在第三方 CDN 上，不发送 API 密钥
+            with self.session.get(
+                url,
+                timeout=60,
+                stream=True,
+                headers={"Authorization": None, "Content-Type": None},
+            ) as response:
+                response.raise_for_status()
+                
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                # 由 copyfileobj 以 1 MiB 缓冲区完成拷贝，decode_content 处理 gzip 等传输编码
+                response.raw.decode_content = True
+                with open(output_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, DOWNLOAD_BUFFER_SIZE)
             
             logger.debug(f"下载完成: {output_path}")
             return output_path
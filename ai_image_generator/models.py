@@ -2,11 +2,16 @@
 数据模型定义
 """
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Python 3.10+ 的 dataclass 支持 slots=True：实例不再分配 __dict__，更省内存、属性访问更快；
+# 旧版本解释器回退为普通 dataclass
+_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class GenerationMode(Enum):
@@ -28,7 +33,7 @@ class ImageServiceProvider(Enum):
     OPENROUTER = "openrouter"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GlobalConfig:
     """全局配置"""
     # 存储服务选择
@@ -57,6 +62,7 @@ class GlobalConfig:
     gcs_folder_path: str = "ImageUpload"
     gcs_credentials_path: str = ""  # 服务账号 JSON 文件路径
     gcs_project_id: str = ""  # GCP 项目 ID
+    gcs_api_endpoint: str = ""  # 自定义 API 端点（如区域端点，可选）
     
     # OpenRouter 图片生成配置（用于 openrouter/* 模型）
     openrouter_image_api_key: str = ""
@@ -64,6 +70,8 @@ class GlobalConfig:
     openrouter_image_site_url: str = ""
     openrouter_image_site_name: str = ""
     openrouter_image_proxy: str = ""  # 代理地址
+    openrouter_image_passthrough_hosts: Optional[List[str]] = None  # 可直传 URL 的图片域名（None 使用默认，[] 关闭直传）
+    openrouter_image_reference_max_edge: int = 0  # 参考图长边像素上限（0 不缩小）
     
     # OpenRouter 文案生成配置（保持原有）
     openrouter_api_key: str = ""
@@ -78,7 +86,7 @@ class GlobalConfig:
     reference_max_samples: int = 5  # 参考文案最多抽取数量
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ImageSelectionConfig:
     """图片选择配置"""
     source_dir: Union[str, List[str]] = ""  # 单个路径或多个路径数组
@@ -89,18 +97,18 @@ class ImageSelectionConfig:
     specified_coverage: int = 100  # 指定图片覆盖的组百分比，默认100%
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class PromptItem:
-    """单个 Prompt 项"""
+    """单个 Prompt 项（不可变，可在多个组之间共享）"""
     id: str
     name: str
     description: str
     enabled: bool
-    tags: List[str]
+    tags: Tuple[str, ...]
     template: str
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ScenePromptConfig:
     """
     场景生成 Prompt 配置
@@ -115,7 +123,7 @@ class ScenePromptConfig:
     custom_template: Optional[str] = None  # 自定义模板内容（优先级最高）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TransferPromptConfig:
     """
     主体迁移 Prompt 配置
@@ -130,7 +138,7 @@ class TransferPromptConfig:
     custom_template: Optional[str] = None  # 自定义模板内容（优先级最高）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class OutputConfig:
     """输出配置"""
     base_dir: str = "./outputs"
@@ -141,7 +149,7 @@ class OutputConfig:
     save_inputs: bool = False  # 是否保存输入文件（产品图、参考图、prompt）
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class OpeningStyle:
     """文案开头风格"""
     name: str
@@ -149,7 +157,7 @@ class OpeningStyle:
     example: str
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TextGenerationConfig:
     """文案生成配置"""
     enabled: bool = True
@@ -173,7 +181,7 @@ class ImageModel(Enum):
     MIDJOURNEY = "midjourney"  # KieAI Midjourney image-to-image
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TemplateConfig:
     """模板配置"""
     name: str
@@ -193,7 +201,7 @@ class TemplateConfig:
     transfer_prompts: Optional[TransferPromptConfig] = None  # 主体迁移模式
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TemplateContext:
     """模板渲染上下文"""
     group_index: int
@@ -220,9 +228,33 @@ class TemplateContext:
         }
         result.update(self.custom_vars)
         return result
+    
+    def for_image(self, image_index: int, reference_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        生成同组内某张图片的渲染变量（无需为每张图片构造新的 TemplateContext）
+        
+        Args:
+            image_index: 图片索引（从0开始）
+            reference_count: 该图片的参考图数量（None 表示沿用组上下文）
+            
+        Returns:
+            Jinja2 渲染用的字典（自定义变量优先）
+        """
+        result = {
+            "group_index": self.group_index,
+            "group_num": self.group_num,
+            "image_index": image_index,
+            "image_num": image_index + 1,
+            "product_count": self.product_count,
+            "reference_count": self.reference_count if reference_count is None else reference_count,
+            "total_groups": self.total_groups,
+            "mode": self.mode,
+        }
+        result.update(self.custom_vars)
+        return result
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class UploadResult:
     """上传结果"""
     path: Path
@@ -230,7 +262,7 @@ class UploadResult:
     moss_id: str
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TaskResult:
     """API任务结果"""
     task_id: str
@@ -239,7 +271,7 @@ class TaskResult:
     error: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ImageResult:
     """单张图片生成结果"""
     index: int
@@ -251,7 +283,7 @@ class ImageResult:
     error: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ProductInfo:
     """产品信息"""
     product_name: str
@@ -273,7 +305,7 @@ class ProductInfo:
         }
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class TextResult:
     """文案生成结果"""
     title: str
@@ -281,6 +313,10 @@ class TextResult:
     success: bool
     error: Optional[str] = None
 
+    # 长度范围（字数，含端点）
+    TITLE_RANGE = (10, 50)
+    CONTENT_RANGE = (100, 1000)
+
     def validate(self) -> tuple[bool, Optional[str]]:
         """
         验证文案质量
@@ -288,28 +324,31 @@ class TextResult:
         Returns:
             (is_valid, error_message)
         """
+        title = self.title
+        content = self.content
+
+        # 空响应是最常见的失败，先检查，不必再比较长度
+        if not title.strip() or not content.strip():
+            return False, "标题或正文为空"
+
         # 检查标题长度
-        title_len = len(self.title)
-        if title_len < 10:
-            return False, f"标题过短（{title_len}字），建议15-30字"
-        if title_len > 50:
-            return False, f"标题过长（{title_len}字），建议15-30字"
+        title_min, title_max = self.TITLE_RANGE
+        title_len = len(title)
+        if not title_min <= title_len <= title_max:
+            hint = "过短" if title_len < title_min else "过长"
+            return False, f"标题{hint}（{title_len}字），建议15-30字"
 
         # 检查正文长度
-        content_len = len(self.content)
-        if content_len < 100:
-            return False, f"正文过短（{content_len}字），建议200-500字"
-        if content_len > 1000:
-            return False, f"正文过长（{content_len}字），建议200-500字"
-
-        # 检查是否包含产品信息
-        if not self.title.strip() or not self.content.strip():
-            return False, "标题或正文为空"
+        content_min, content_max = self.CONTENT_RANGE
+        content_len = len(content)
+        if not content_min <= content_len <= content_max:
+            hint = "过短" if content_len < content_min else "过长"
+            return False, f"正文{hint}（{content_len}字），建议200-500字"
 
         return True, None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GroupResult:
     """组生成结果"""
     group_index: int
@@ -357,7 +396,7 @@ class GroupResult:
         return result
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RunState:
     """运行状态（用于断点续传）"""
     template_config_path: str
@@ -388,7 +427,7 @@ class RunState:
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RunResult:
     """运行结果"""
     run_dir: Path
@@ -416,7 +455,7 @@ class RunResult:
         return result
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GenerationLog:
     """生成日志"""
     template_name: str
@@ -3,22 +3,156 @@ MOSS上传器 - 负责图片上传和URL管理
 """
 
 import asyncio
+import functools
+import importlib.util
 import logging
+import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from .async_utils import BackgroundLoop
 from .exceptions import MOSSError
 from .models import UploadResult
 
 logger = logging.getLogger(__name__)
 
+# MOSS_pro_utils 模块（首次使用时导入；导入失败的结果同样缓存，不再重复尝试）
+_moss_module: Any = None
+_moss_import_failed = False
+
+
+def _load_moss() -> Any:
+    """
+    导入 MOSS_pro_utils（进程内只导入一次）
+    
+    Returns:
+        MOSS_pro_utils 模块
+        
+    Raises:
+        MOSSError: 模块不可用
+    """
+    global _moss_module, _moss_import_failed
+    if _moss_module is None:
+        if not _moss_import_failed:
+            try:
+                import MOSS_pro_utils
+                _moss_module = MOSS_pro_utils
+            except ImportError:
+                _moss_import_failed = True
+        if _moss_module is None:
+            raise MOSSError("无法导入MOSS_pro_utils模块")
+    return _moss_module
+
+
+@functools.lru_cache(maxsize=1)
+def _load_heif_image() -> Any:
+    """导入 PIL.Image 并注册 pillow-heif 的 HEIF opener（每个进程只执行一次）"""
+    from PIL import Image
+    import pillow_heif
+    
+    pillow_heif.register_heif_opener()
+    return Image
+
+
+@functools.lru_cache(maxsize=1)
+def _heic_backends() -> Tuple[str, ...]:
+    """
+    检测可用的 HEIC 转换后端（只检测一次）
+    
+    优先使用进程内的 pillow-heif，避免每个文件 fork/exec 外部命令；
+    不存在的命令不会再被尝试
+    
+    Returns:
+        按优先级排列的可用后端名称
+    """
+    backends = []
+    if importlib.util.find_spec("pillow_heif") and importlib.util.find_spec("PIL"):
+        backends.append("pillow_heif")
+    if shutil.which("sips"):
+        backends.append("sips")
+    if shutil.which("convert"):
+        backends.append("convert")
+    return tuple(backends)
+
+
+def _convert_with_pillow_heif(heic_path: Path, out_path: Path):
+    """使用 pillow-heif 转换为 JPG"""
+    Image = _load_heif_image()
+    with Image.open(heic_path) as img:
+        img.save(out_path, "JPEG", quality=95)
+
+
+async def _gather_or_cancel(tasks: List[asyncio.Future]):
+    """
+    等待所有任务完成；任一任务失败时取消其余任务并抛出该异常
+    
+    保证离开 MossProUtils 上下文（关闭 HTTP 客户端）前没有仍在运行的任务
+    """
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _convert_heic(heic_path: Path, output_dir: Path) -> Path:
+    """
+    将HEIC/HEIF转换为JPG
+    
+    Args:
+        heic_path: HEIC文件路径
+        output_dir: 输出目录
+        
+    Returns:
+        转换后的JPG文件路径
+    """
+    out_name = heic_path.stem + ".jpg"
+    out_path = output_dir / out_name
+    
+    backends = _heic_backends()
+    if not backends:
+        raise MOSSError(f"无法转换HEIC文件，请安装pillow-heif: {heic_path}")
+    
+    errors = []
+    for backend in backends:
+        try:
+            if backend == "pillow_heif":
+                _convert_with_pillow_heif(heic_path, out_path)
+            elif backend == "sips":
+                # macOS
+                subprocess.run(
+                    ["sips", "-s", "format", "jpeg", str(heic_path), "--out", str(out_path)],
+                    check=True,
+                    capture_output=True,
+                )
+            else:
+                # ImageMagick
+                subprocess.run(
+                    ["convert", str(heic_path), str(out_path)],
+                    check=True,
+                    capture_output=True,
+                )
+            return out_path
+        except Exception as e:
+            errors.append(f"{backend}: {e}")
+    
+    raise MOSSError(f"HEIC转换失败: {heic_path}, {'; '.join(errors)}")
+
 
 class MOSSUploader:
     """MOSS存储上传器"""
     
+    # 缓存的URL提前失效的秒数，避免拿到即将过期的URL
+    URL_EXPIRY_MARGIN = 60
+    
     def __init__(
         self,
         base_url: str,
@@ -26,6 +160,8 @@ class MOSSUploader:
         access_key_secret: str,
         bucket_name: str,
         expire_seconds: int = 86400,
+        max_concurrency: int = 8,
+        max_cache_entries: int = 4096,
     ):
         """
         初始化上传器
@@ -36,39 +172,113 @@ class MOSSUploader:
             access_key_secret: 访问密钥
             bucket_name: 存储桶名称
             expire_seconds: URL过期时间（秒）
+            max_concurrency: 批量上传/刷新时的最大并发数
+            max_cache_entries: URL缓存的最大条目数（超出时淘汰最久未使用的条目）
         """
         self.base_url = base_url
         self.access_key_id = access_key_id
         self.access_key_secret = access_key_secret
         self.bucket_name = bucket_name
         self.expire_seconds = expire_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_cache_entries = max(1, max_cache_entries)
         
-        # URL缓存: path -> (url, moss_id)
-        self._cache: Dict[str, Tuple[str, str]] = {}
+        # URL缓存（LRU）: (绝对路径, mtime_ns) -> (url, moss_id, 过期时间 monotonic)
+        # 文件被修改后 mtime 变化，不会再命中旧的URL
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[str, str, float]]" = OrderedDict()
+        # 引擎的多个工作线程会同时读写缓存（含 LRU 顺序调整和淘汰）
+        self._cache_lock = threading.Lock()
         
         # MOSS工具实例（延迟初始化）
         self._moss_utils = None
         self._moss_config = None
+        
+        # 同步接口使用的后台事件循环及常驻 MossProUtils 会话（首次调用时创建，close 时关闭）
+        self._bg_loop = BackgroundLoop("moss-uploader-loop")
+        self._session_lock: Optional[asyncio.Lock] = None
+        
+        # HEIC 转换用的会话级临时目录（首次转换时创建，close 时删除）
+        self._session_tempdir: Optional[Path] = None
+    
+    async def __aenter__(self) -> "MOSSUploader":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """释放资源（关闭常驻会话，删除会话临时目录）"""
+        self.close()
+    
+    def close(self):
+        """关闭常驻会话和后台事件循环，删除会话临时目录（之后再次使用时会重新创建）"""
+        if self._bg_loop.is_running:
+            try:
+                self._bg_loop.run(self._close_session())
+            except Exception as e:
+                logger.warning(f"关闭MOSS会话失败: {e}")
+            self._bg_loop.close()
+        if self._session_tempdir is not None:
+            shutil.rmtree(self._session_tempdir, ignore_errors=True)
+            self._session_tempdir = None
+    
+    def _ensure_tempdir(self) -> Path:
+        """获取会话临时目录（延迟创建）"""
+        if self._session_tempdir is None:
+            self._session_tempdir = Path(tempfile.mkdtemp(prefix="moss_upload_"))
+        return self._session_tempdir
+    
+    def _run_sync(self, coro_factory: Callable[[Any], Awaitable[Any]]) -> Any:
+        """
+        在后台事件循环中使用常驻 MossProUtils 会话执行协程并等待结果
+        
+        同步接口不再每次 asyncio.run 新建事件循环和会话
+        
+        Args:
+            coro_factory: 接收已打开的 MossProUtils 实例、返回协程的函数
+            
+        Returns:
+            协程的返回值
+        """
+        async def _run():
+            return await coro_factory(await self._get_session())
+        
+        return self._bg_loop.run(_run())
+    
+    async def _get_session(self) -> Any:
+        """获取常驻 MossProUtils 会话（在后台事件循环中调用）"""
+        if self._moss_utils is None:
+            # 多个线程的请求可能同时到达，保证只打开一个会话
+            if self._session_lock is None:
+                self._session_lock = asyncio.Lock()
+            async with self._session_lock:
+                if self._moss_utils is None:
+                    moss = _load_moss().MossProUtils(self._get_moss_config())
+                    await moss.__aenter__()
+                    self._moss_utils = moss
+        return self._moss_utils
+    
+    async def _close_session(self):
+        """关闭常驻 MossProUtils 会话（在后台事件循环中调用）"""
+        moss, self._moss_utils = self._moss_utils, None
+        self._session_lock = None
+        if moss is not None:
+            await moss.__aexit__(None, None, None)
     
     def _get_moss_config(self):
         """获取MOSS配置"""
         if self._moss_config is None:
-            # 导入MOSS工具
-            try:
-                from MOSS_pro_utils import MossConfig
-                self._moss_config = MossConfig(
-                    base_url=self.base_url,
-                    access_key_id=self.access_key_id,
-                    access_key_secret=self.access_key_secret,
-                    bucket_name=self.bucket_name,
-                )
-            except ImportError:
-                raise MOSSError("无法导入MOSS_pro_utils模块")
+            self._moss_config = _load_moss().MossConfig(
+                base_url=self.base_url,
+                access_key_id=self.access_key_id,
+                access_key_secret=self.access_key_secret,
+                bucket_name=self.bucket_name,
+            )
         return self._moss_config
     
     def _convert_heic_to_jpg(self, heic_path: Path, output_dir: Path) -> Path:
         """
-        将HEIC/HEIF转换为JPG
+        将HEIC/HEIF转换为JPG（在当前进程中执行）
         
         Args:
             heic_path: HEIC文件路径
@@ -77,58 +287,30 @@ class MOSSUploader:
         Returns:
             转换后的JPG文件路径
         """
-        out_name = heic_path.stem + ".jpg"
-        out_path = output_dir / out_name
-        
-        try:
-            # 尝试使用sips（macOS）
-            subprocess.run(
-                ["sips", "-s", "format", "jpeg", str(heic_path), "--out", str(out_path)],
-                check=True,
-                capture_output=True,
-            )
-            return out_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-        
-        try:
-            # 尝试使用ImageMagick
-            subprocess.run(
-                ["convert", str(heic_path), str(out_path)],
-                check=True,
-                capture_output=True,
-            )
-            return out_path
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-        
-        try:
-            # 尝试使用pillow-heif
-            from PIL import Image
-            import pillow_heif
-            
-            pillow_heif.register_heif_opener()
-            img = Image.open(heic_path)
-            img.save(out_path, "JPEG", quality=95)
-            return out_path
-        except ImportError:
-            raise MOSSError(f"无法转换HEIC文件，请安装pillow-heif: {heic_path}")
-        except Exception as e:
-            raise MOSSError(f"HEIC转换失败: {heic_path}, {e}")
+        return _convert_heic(heic_path, output_dir)
     
-    def _prepare_image(self, path: Path, temp_dir: Path) -> Path:
+    async def _prepare_image(self, path: Path) -> Path:
         """
         准备图片用于上传（如需要则转换格式）
         
+        只有 HEIC 才会用到临时目录；每次转换使用会话目录下独立的子目录，
+        避免不同目录下的同名文件互相覆盖。转换在默认线程池中执行
+        （pillow-heif 解码时释放 GIL，外部命令在子进程中运行），不阻塞事件循环中的上传
+        
         Args:
             path: 原始图片路径
-            temp_dir: 临时目录
             
         Returns:
-            准备好的图片路径
+            准备好的图片路径（无需转换时即原路径）
         """
         if path.suffix.lower() in {".heic", ".heif"}:
-            return self._convert_heic_to_jpg(path, temp_dir)
+            output_dir = Path(tempfile.mkdtemp(dir=self._ensure_tempdir()))
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(None, _convert_heic, path, output_dir)
+            except BaseException:
+                shutil.rmtree(output_dir, ignore_errors=True)
+                raise
         return path
     
     def get_cached_url(self, path: Path) -> Optional[str]:
@@ -141,14 +323,48 @@ class MOSSUploader:
         Returns:
             缓存的URL，如果没有返回None
         """
-        key = str(path.resolve())
-        if key in self._cache:
-            return self._cache[key][0]
-        return None
+        cached = self._cache_get(self._cache_key(path))
+        return cached[0] if cached else None
     
     def clear_cache(self):
         """清除URL缓存"""
-        self._cache.clear()
+        with self._cache_lock:
+            self._cache.clear()
+    
+    @staticmethod
+    def _cache_key(path: Path) -> Optional[Tuple[str, int]]:
+        """缓存键（绝对路径, mtime_ns），文件不存在时返回None"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        return os.path.abspath(path), mtime_ns
+    
+    def _cache_get(self, key: Optional[Tuple[str, int]]) -> Optional[Tuple[str, str]]:
+        """查询缓存，过期条目直接删除；命中时返回 (url, moss_id)"""
+        if key is None:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            url, moss_id, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+        return url, moss_id
+    
+    def _cache_put(self, key: Optional[Tuple[str, int]], url: str, moss_id: str):
+        """写入缓存并淘汰超出容量的最久未使用条目"""
+        if key is None:
+            return
+        ttl = max(self.expire_seconds - self.URL_EXPIRY_MARGIN, 0)
+        with self._cache_lock:
+            self._cache[key] = (url, moss_id, time.monotonic() + ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
 
     async def upload_image(self, path: Path, folder: str) -> UploadResult:
         """
@@ -162,52 +378,92 @@ class MOSSUploader:
             UploadResult: 包含url和moss_id
         """
         # 检查缓存
-        cache_key = str(path.resolve())
-        if cache_key in self._cache:
-            url, moss_id = self._cache[cache_key]
+        cached = self._get_cached_result(path)
+        if cached:
+            return cached
+        
+        # 导入MOSS工具
+        MossProUtils = _load_moss().MossProUtils
+        
+        async with MossProUtils(self._get_moss_config()) as moss:
+            return await self._upload_one(moss, path, folder)
+    
+    def _get_cached_result(self, path: Path) -> Optional[UploadResult]:
+        """查询缓存，命中时返回上传结果"""
+        cached = self._cache_get(self._cache_key(path))
+        if cached:
+            url, moss_id = cached
+            logger.debug(f"使用缓存URL: {path.name}")
+            return UploadResult(path=path, url=url, moss_id=moss_id)
+        return None
+    
+    async def _upload_one(self, moss: Any, path: Path, folder: str) -> UploadResult:
+        """
+        使用已打开的 MossProUtils 上传单张图片
+        
+        Args:
+            moss: 已进入上下文的 MossProUtils 实例
+            path: 图片路径
+            folder: MOSS文件夹路径
+            
+        Returns:
+            UploadResult: 包含url和moss_id
+        """
+        cache_key = self._cache_key(path)
+        cached = self._cache_get(cache_key)
+        if cached:
+            url, moss_id = cached
             logger.debug(f"使用缓存URL: {path.name}")
             return UploadResult(path=path, url=url, moss_id=moss_id)
         
-        # 准备图片（转换HEIC等）
-        temp_dir = Path(tempfile.mkdtemp(prefix="moss_upload_"))
+        # 准备图片（转换HEIC等，普通图片直接上传原文件）
+        upload_path = await self._prepare_image(path)
         try:
-            upload_path = self._prepare_image(path, temp_dir)
+            # 上传文件
+            upload_res = await moss.upload_file(
+                file_path=str(upload_path),
+                folder_path=folder,
+            )
             
-            # 导入MOSS工具
-            from MOSS_pro_utils import MossProUtils
+            moss_id = upload_res.get("moss_id") or upload_res.get("existing_moss_id")
+            if not moss_id:
+                raise MOSSError(f"上传未返回moss_id: {upload_res}")
             
-            config = self._get_moss_config()
+            # 获取下载URL
+            url = await self._fetch_url(moss, str(moss_id), "获取下载URL失败")
             
-            async with MossProUtils(config) as moss:
-                # 上传文件
-                upload_res = await moss.upload_file(
-                    file_path=str(upload_path),
-                    folder_path=folder,
-                )
-                
-                moss_id = upload_res.get("moss_id") or upload_res.get("existing_moss_id")
-                if not moss_id:
-                    raise MOSSError(f"上传未返回moss_id: {upload_res}")
-                
-                # 获取下载URL
-                url_res = await moss.get_download_url_by_moss_id(
-                    moss_id=str(moss_id),
-                    expire_seconds=self.expire_seconds,
-                )
-                
-                if not url_res.get("success") or not url_res.get("url"):
-                    raise MOSSError(f"获取下载URL失败: {url_res}")
-                
-                url = str(url_res["url"])
-                
-                # 缓存结果
-                self._cache[cache_key] = (url, str(moss_id))
-                
-                logger.info(f"上传成功: {path.name} -> {moss_id}")
-                return UploadResult(path=path, url=url, moss_id=str(moss_id))
+            # 缓存结果
+            self._cache_put(cache_key, url, str(moss_id))
+            
+            logger.info(f"上传成功: {path.name} -> {moss_id}")
+            return UploadResult(path=path, url=url, moss_id=str(moss_id))
         
         finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            if upload_path is not path:
+                # 上传完成后删除转换产生的文件
+                shutil.rmtree(upload_path.parent, ignore_errors=True)
+    
+    async def _fetch_url(self, moss: Any, moss_id: str, error_prefix: str) -> str:
+        """
+        获取下载URL
+        
+        Args:
+            moss: 已进入上下文的 MossProUtils 实例
+            moss_id: MOSS文件ID
+            error_prefix: 失败时的错误信息前缀
+            
+        Returns:
+            下载URL
+        """
+        url_res = await moss.get_download_url_by_moss_id(
+            moss_id=moss_id,
+            expire_seconds=self.expire_seconds,
+        )
+        
+        if not url_res.get("success") or not url_res.get("url"):
+            raise MOSSError(f"{error_prefix}: moss_id={moss_id}, {url_res}")
+        
+        return str(url_res["url"])
     
     async def upload_batch(
         self,
@@ -215,19 +471,72 @@ class MOSSUploader:
         folder: str,
     ) -> List[UploadResult]:
         """
-        批量上传图片
+        批量上传图片（共用一个 MossProUtils 会话，有界并发）
         
         Args:
             paths: 图片路径列表
             folder: MOSS文件夹路径
             
         Returns:
-            上传结果列表
+            上传结果列表（与 paths 顺序一致）
+        """
+        # 全部命中缓存时无需建立会话
+        cached = [self._get_cached_result(path) for path in paths]
+        if all(cached):
+            return cached
+        
+        MossProUtils = _load_moss().MossProUtils
+        
+        async with MossProUtils(self._get_moss_config()) as moss:
+            return await self._upload_batch_with(moss, paths, folder, cached)
+    
+    async def _upload_batch_with(
+        self,
+        moss: Any,
+        paths: List[Path],
+        folder: str,
+        cached: Optional[List[Optional[UploadResult]]] = None,
+    ) -> List[UploadResult]:
+        """
+        使用已打开的 MossProUtils 会话批量上传（有界并发）
+        
+        Args:
+            moss: 已进入上下文的 MossProUtils 实例
+            paths: 图片路径列表
+            folder: MOSS文件夹路径
+            cached: 已查询过的缓存结果（与 paths 对应），None 表示尚未查询
+            
+        Returns:
+            上传结果列表（与 paths 顺序一致）
         """
-        results = []
-        for path in paths:
-            result = await self.upload_image(path, folder)
-            results.append(result)
+        if cached is None:
+            cached = [self._get_cached_result(path) for path in paths]
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: List[Optional[UploadResult]] = list(cached)
+        # 同一批次中的重复路径只上传一次
+        tasks: Dict[str, asyncio.Future] = {}
+        positions: List[Tuple[int, str]] = []
+        
+        async def _worker(path: Path) -> UploadResult:
+            async with semaphore:
+                return await self._upload_one(moss, path, folder)
+        
+        for i, path in enumerate(paths):
+            if results[i]:
+                continue
+            key = os.path.abspath(path)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(_worker(path))
+            positions.append((i, key))
+        
+        await _gather_or_cancel(list(tasks.values()))
+        
+        for i, key in positions:
+            result = tasks[key].result()
+            if result.path != paths[i]:
+                result = UploadResult(path=paths[i], url=result.url, moss_id=result.moss_id)
+            results[i] = result
         return results
     
     async def refresh_url(self, moss_id: str) -> str:
@@ -240,24 +549,53 @@ class MOSSUploader:
         Returns:
             新的URL
         """
-        from MOSS_pro_utils import MossProUtils
+        MossProUtils = _load_moss().MossProUtils
         
-        config = self._get_moss_config()
+        async with MossProUtils(self._get_moss_config()) as moss:
+            return await self._fetch_url(moss, moss_id, "刷新URL失败")
+    
+    async def refresh_urls(self, moss_ids: List[str]) -> List[str]:
+        """
+        刷新多个URL（共用一个 MossProUtils 会话，有界并发）
         
-        async with MossProUtils(config) as moss:
-            url_res = await moss.get_download_url_by_moss_id(
-                moss_id=moss_id,
-                expire_seconds=self.expire_seconds,
-            )
+        Args:
+            moss_ids: MOSS文件ID列表
             
-            if not url_res.get("success") or not url_res.get("url"):
-                raise MOSSError(f"刷新URL失败: moss_id={moss_id}, {url_res}")
+        Returns:
+            新的URL列表（与 moss_ids 顺序一致）
+        """
+        if not moss_ids:
+            return []
+        
+        MossProUtils = _load_moss().MossProUtils
+        
+        async with MossProUtils(self._get_moss_config()) as moss:
+            return await self._refresh_urls_with(moss, moss_ids)
+    
+    async def _refresh_urls_with(self, moss: Any, moss_ids: List[str]) -> List[str]:
+        """
+        使用已打开的 MossProUtils 会话刷新多个URL（有界并发）
+        
+        Args:
+            moss: 已进入上下文的 MossProUtils 实例
+            moss_ids: MOSS文件ID列表
             
-            return str(url_res["url"])
+        Returns:
+            新的URL列表（与 moss_ids 顺序一致）
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def _worker(moss_id: str) -> str:
+            async with semaphore:
+                return await self._fetch_url(moss, moss_id, "刷新URL失败")
+        
+        tasks = [asyncio.ensure_future(_worker(moss_id)) for moss_id in moss_ids]
+        await _gather_or_cancel(tasks)
+        return [task.result() for task in tasks]
     
     def upload_batch_sync(self, paths: List[Path], folder: str) -> List[UploadResult]:
         """
-        同步批量上传（包装异步方法）
+        同步批量上传（在后台事件循环中复用常驻会话）
         
         Args:
             paths: 图片路径列表
@@ -266,11 +604,14 @@ class MOSSUploader:
         Returns:
             上传结果列表
         """
-        return asyncio.run(self.upload_batch(paths, folder))
+        cached = [self._get_cached_result(path) for path in paths]
+        if all(cached):
+            return cached
+        return self._run_sync(lambda moss: self._upload_batch_with(moss, paths, folder))
     
     def refresh_urls_sync(self, moss_ids: List[str]) -> List[str]:
         """
-        同步刷新多个URL
+        同步刷新多个URL（在后台事件循环中复用常驻会话）
         
         Args:
             moss_ids: MOSS文件ID列表
@@ -278,11 +619,6 @@ class MOSSUploader:
         Returns:
             新的URL列表
         """
-        async def _refresh_all():
-            urls = []
-            for moss_id in moss_ids:
-                url = await self.refresh_url(moss_id)
-                urls.append(url)
-            return urls
-        
-        return asyncio.run(_refresh_all())
+        if not moss_ids:
+            return []
+        return self._run_sync(lambda moss: self._refresh_urls_with(moss, moss_ids))
@@ -2,13 +2,13 @@
 输出管理器 - 负责输出目录和文件管理
 """
 
-import json
 import logging
 import re
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .json_utils import dump_json_file, load_json_file
 from .models import GenerationLog, GroupResult, RunResult
 
 logger = logging.getLogger(__name__)
@@ -143,8 +143,7 @@ class OutputManager:
         
         log_path = self.run_dir / "generation_log.json"
         
-        with open(log_path, "w", encoding="utf-8") as f:
-            json.dump(log.to_dict(), f, ensure_ascii=False, indent=2)
+        dump_json_file(log.to_dict(), log_path)
         
         logger.info(f"保存生成日志: {log_path}")
     
@@ -158,8 +157,7 @@ class OutputManager:
         group_dir = Path(group_result.group_dir)
         result_path = group_dir / "result.json"
         
-        with open(result_path, "w", encoding="utf-8") as f:
-            json.dump(group_result.to_dict(), f, ensure_ascii=False, indent=2)
+        dump_json_file(group_result.to_dict(), result_path)
         
         logger.debug(f"保存组结果: {result_path}")
     
@@ -178,8 +176,7 @@ class OutputManager:
             return None
         
         try:
-            with open(log_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_json_file(log_path)
             
             return GenerationLog(
                 template_name=data.get("template_name", ""),
@@ -10,6 +10,7 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Set
 
 from .exceptions import GeneratorError
+from .json_utils import dump_json_file, load_json_file
 from .models import GroupResult, RunState
 
 logger = logging.getLogger(__name__)
@@ -43,8 +44,7 @@ class StateManager:
             return None
         
         try:
-            with open(self.state_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = load_json_file(self.state_file)
             
             self._state = RunState.from_dict(data)
             logger.info(f"加载状态: 已完成{len(self._state.completed_groups)}组")
@@ -68,8 +68,7 @@ class StateManager:
             self._state = state
             self.state_dir.mkdir(parents=True, exist_ok=True)
             
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(state.to_dict(), f, ensure_ascii=False, indent=2)
+            dump_json_file(state.to_dict(), self.state_file)
             
             logger.debug(f"保存状态: 已完成{len(state.completed_groups)}组")
     
@@ -111,8 +110,7 @@ class StateManager:
             
             # 直接写入文件（已在锁内）
             self.state_dir.mkdir(parents=True, exist_ok=True)
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self._state.to_dict(), f, ensure_ascii=False, indent=2)
+            dump_json_file(self._state.to_dict(), self.state_file)
             
             logger.info(f"组{group_index + 1}完成，已保存状态")
     
@@ -131,8 +129,7 @@ class StateManager:
             
             # 直接写入文件（已在锁内）
             self.state_dir.mkdir(parents=True, exist_ok=True)
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self._state.to_dict(), f, ensure_ascii=False, indent=2)
+            dump_json_file(self._state.to_dict(), self.state_file)
     
     def get_next_group_index(self, total_groups: int) -> int:
         """
@@ -2,17 +2,58 @@
 Jinja2模板引擎 - 负责模板加载和渲染
 """
 
+import functools
 import logging
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
 
-from jinja2 import Environment, FileSystemLoader, Template, TemplateError
+from jinja2 import (
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    TemplateError,
+)
 
 from .exceptions import TemplateRenderError
 from .models import TemplateContext
 
 logger = logging.getLogger(__name__)
 
+# 编译结果缓存上限（按模板源码缓存，prompt 模板数量有限）
+TEMPLATE_CACHE_SIZE = 1024
+
+# 进程共享的字节码缓存（延迟创建；创建失败后不再重试）
+_bytecode_cache: Optional[BytecodeCache] = None
+_bytecode_cache_unavailable = False
+
+
+def get_bytecode_cache() -> Optional[BytecodeCache]:
+    """
+    获取共享的 Jinja2 字节码缓存
+    
+    编译结果按模板源码的哈希持久化到系统临时目录，后续运行无需重新解析模板
+    
+    Returns:
+        字节码缓存，缓存目录不可用时返回None
+    """
+    global _bytecode_cache, _bytecode_cache_unavailable
+    if _bytecode_cache is None and not _bytecode_cache_unavailable:
+        try:
+            _bytecode_cache = FileSystemBytecodeCache()
+        except Exception as e:
+            logger.debug(f"Jinja2 字节码缓存不可用: {e}")
+            _bytecode_cache_unavailable = True
+    return _bytecode_cache
+
+
+def clear_jinja_cache():
+    """清除磁盘上的 Jinja2 字节码缓存（模板行为异常时强制重新编译）"""
+    cache = get_bytecode_cache()
+    if cache is not None:
+        cache.clear()
+
 
 class TemplateEngine:
     """Jinja2模板引擎"""
@@ -31,9 +72,39 @@ class TemplateEngine:
             self.env = Environment(
                 loader=FileSystemLoader(str(template_dir)),
                 autoescape=False,  # prompt不需要HTML转义
+                bytecode_cache=get_bytecode_cache(),
             )
         else:
-            self.env = Environment(autoescape=False)
+            self.env = Environment(autoescape=False, bytecode_cache=get_bytecode_cache())
+        
+        # from_string 每次都会重新编译，按模板源码缓存编译结果
+        self._compile = functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self._compile_source)
+    
+    def _compile_source(self, source: str) -> Template:
+        """
+        编译模板字符串（经过字节码缓存，跨运行复用编译结果）
+        
+        Args:
+            source: 模板源码
+            
+        Returns:
+            编译后的模板
+        """
+        bcc = self.env.bytecode_cache
+        if bcc is None:
+            return self.env.from_string(source)
+        
+        # 与 Loader.load 相同的流程：以源码作为缓存键，命中时跳过解析和编译
+        bucket = bcc.get_bucket(self.env, source, None, source)
+        code = bucket.code
+        if code is None:
+            code = self.env.compile(source)
+            bucket.code = code
+            try:
+                bcc.set_bucket(bucket)
+            except OSError as e:
+                logger.debug(f"写入 Jinja2 字节码缓存失败: {e}")
+        return self.env.template_class.from_code(self.env, code, self.env.make_globals(None))
     
     def load_template(self, path: Path) -> str:
         """
@@ -66,7 +137,7 @@ class TemplateEngine:
             渲染后的字符串
         """
         try:
-            template = self.env.from_string(template_str)
+            template = self._compile(template_str)
             return template.render(**context.to_dict())
         except TemplateError as e:
             logger.warning(f"模板渲染失败: {e}, 返回原始模板")
@@ -75,19 +146,19 @@ class TemplateEngine:
             logger.warning(f"模板渲染异常: {e}, 返回原始模板")
             return template_str
     
-    def render_dict(self, template_str: str, context_dict: Dict[str, Any]) -> str:
+    def render_dict(self, template_str: str, context_dict: Mapping[str, Any]) -> str:
         """
-        使用字典渲染模板
+        使用字典（或 TemplateContext.for_image 返回的映射）渲染模板
         
         Args:
             template_str: 模板字符串
-            context_dict: 上下文字典
+            context_dict: 上下文映射
             
         Returns:
             渲染后的字符串
         """
         try:
-            template = self.env.from_string(template_str)
+            template = self._compile(template_str)
             return template.render(**context_dict)
         except TemplateError as e:
             logger.warning(f"模板渲染失败: {e}, 返回原始模板")
@@ -8,13 +8,18 @@ import logging
 import random
 import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-from openai import AsyncOpenAI
 
+from .async_utils import BackgroundLoop
 from .exceptions import GeneratorError
 from .models import ProductInfo, TextResult
+from .template_engine import get_bytecode_cache
+
+if TYPE_CHECKING:
+    # openai SDK 导入较慢（连带 pydantic 等），只在配置了 API Key 时才真正导入
+    from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -87,28 +92,45 @@ class TextGenerator:
 
         # 初始化 OpenAI 异步客户端
         # 先创建直连客户端，如果连接失败再尝试代理
-        self.client: Optional[AsyncOpenAI] = None
-        self.client_with_proxy: Optional[AsyncOpenAI] = None
-        
-        if api_key:
-            # 直连客户端（无代理）
-            self.client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=base_url,
-            )
-            
-            # 代理客户端（备用）
-            if proxy:
-                import httpx
-                http_client = httpx.AsyncClient(proxy=proxy)
-                self.client_with_proxy = AsyncOpenAI(
-                    api_key=api_key,
-                    base_url=base_url,
-                    http_client=http_client,
-                )
+        self.client: Optional["AsyncOpenAI"] = None
+        self.client_with_proxy: Optional["AsyncOpenAI"] = None
+        self._create_clients()
 
         # 初始化 Jinja2 环境
         self._jinja_env: Optional[Environment] = None
+        
+        # generate_sync 使用的后台事件循环（首次调用时创建，close 时关闭）；
+        # 异步客户端的连接池始终绑定在同一个事件循环上，可跨调用复用
+        self._bg_loop = BackgroundLoop("text-generator-loop")
+    
+    def _create_clients(self):
+        """创建 OpenAI 异步客户端（未配置 API Key 时不创建）"""
+        if not self.api_key:
+            return
+        
+        from openai import AsyncOpenAI
+        
+        # 直连客户端（无代理）
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+        )
+        
+        # 代理客户端（备用）
+        if self.proxy:
+            import httpx
+            http_client = httpx.AsyncClient(proxy=self.proxy)
+            self.client_with_proxy = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+            )
+    
+    async def _aclose_clients(self):
+        """关闭 OpenAI 异步客户端的连接池"""
+        for client in (self.client, self.client_with_proxy):
+            if client is not None:
+                await client.close()
     
     def is_enabled(self) -> bool:
         """检查服务是否启用"""
@@ -121,7 +143,8 @@ class TextGenerator:
             self._jinja_env = Environment(
                 loader=FileSystemLoader(str(template_dir)),
                 extensions=["jinja2.ext.loopcontrols"],
-                autoescape=False
+                autoescape=False,
+                bytecode_cache=get_bytecode_cache(),
             )
         return self._jinja_env
     
@@ -367,7 +390,7 @@ class TextGenerator:
     
     async def _generate_with_client(
         self,
-        client: AsyncOpenAI,
+        client: "AsyncOpenAI",
         full_prompt: str,
         product_info: Dict[str, Any],
         use_proxy: bool = False,
@@ -497,5 +520,16 @@ class TextGenerator:
         context: Optional[str] = None,
         opening_styles: Optional[List[Dict[str, str]]] = None,
     ) -> TextResult:
-        """同步版本的生成方法"""
-        return asyncio.run(self.generate(product_info, context, opening_styles))
+        """同步版本的生成方法（在常驻的后台事件循环中执行，可被多个线程同时调用）"""
+        return self._bg_loop.run(self.generate(product_info, context, opening_styles))
+    
+    def close(self):
+        """关闭 generate_sync 使用的后台事件循环及其上的客户端连接池（再次调用时会重新创建）"""
+        if self._bg_loop.is_running:
+            try:
+                self._bg_loop.run(self._aclose_clients())
+            except Exception as e:
+                logger.debug(f"关闭文案生成客户端失败: {e}")
+            # 旧客户端的连接池绑定在即将关闭的事件循环上，重新创建以便 close 后继续使用
+            self._create_clients()
+        self._bg_loop.close()
@@ -0,0 +1,98 @@
+"""
+GCSUploader 条件上传测试（if_generation_match=0 代替 exists() 检查）
+"""
+
+import pytest
+
+exceptions = pytest.importorskip("google.api_core.exceptions")
+
+from ai_image_generator.gcs_uploader import GCSUploader
+
+
+class _FakeBlob:
+    def __init__(self, bucket, name, chunk_size=None):
+        self.bucket = bucket
+        self.name = name
+        self.content_type = None
+    
+    @property
+    def public_url(self):
+        return f"https://storage.example/{self.name}"
+    
+    def exists(self):
+        raise AssertionError("不应调用 exists()")
+    
+    def make_public(self):
+        pass
+    
+    def upload_from_file(self, fh, size=None, content_type=None, if_generation_match=None):
+        self.bucket.uploads.append((self.name, if_generation_match))
+        if self.name in self.bucket.existing:
+            raise exceptions.PreconditionFailed("exists")
+
+
+class _FakeBucket:
+    def __init__(self, existing=()):
+        self.existing = set(existing)
+        self.uploads = []
+    
+    def blob(self, name, chunk_size=None):
+        return _FakeBlob(self, name, chunk_size)
+
+
+class _FakeTransferManager:
+    THREAD = "thread"
+    
+    def __init__(self, bucket):
+        self.bucket = bucket
+    
+    def upload_many(self, file_blob_pairs, skip_if_exists=False, max_workers=None, worker_type=None):
+        assert skip_if_exists
+        results = []
+        for _, blob in file_blob_pairs:
+            self.bucket.uploads.append((blob.name, 0))
+            results.append(exceptions.PreconditionFailed("exists") if blob.name in self.bucket.existing else None)
+        return results
+
+
+def _make_uploader(bucket) -> GCSUploader:
+    uploader = GCSUploader("bucket", folder_path="up", make_public=False)
+    uploader._client = object()
+    uploader._bucket = bucket
+    return uploader
+
+
+def test_upload_image_uses_generation_precondition(tmp_path):
+    """新对象按 if_generation_match=0 上传；已存在的对象返回公开 URL 并缓存"""
+    (tmp_path / "new.jpg").write_bytes(b"1")
+    (tmp_path / "old.jpg").write_bytes(b"2")
+    bucket = _FakeBucket(existing={"up/old.jpg"})
+    uploader = _make_uploader(bucket)
+    
+    new = uploader.upload_image(tmp_path / "new.jpg")
+    old = uploader.upload_image(tmp_path / "old.jpg")
+    
+    assert bucket.uploads == [("up/new.jpg", 0), ("up/old.jpg", 0)]
+    assert new.url == "https://storage.example/up/new.jpg"
+    assert old.url == "https://storage.example/up/old.jpg"
+    # 已存在的对象也写入缓存，再次上传不发请求
+    assert uploader.upload_image(tmp_path / "old.jpg").url == old.url
+    assert len(bucket.uploads) == 2
+
+
+def test_batch_upload_skips_existing(tmp_path):
+    """批量上传：已存在的对象以 PreconditionFailed 返回，同一文件只上传一次，结果与输入顺序一致"""
+    paths = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.jpg"
+        path.write_bytes(name.encode())
+        paths.append(path)
+    bucket = _FakeBucket(existing={"up/a.jpg"})
+    uploader = _make_uploader(bucket)
+    
+    results = uploader._upload_batch_with_transfer_manager(
+        [paths[0], paths[1], paths[0]], None, _FakeTransferManager(bucket)
+    )
+    
+    assert [r.moss_id for r in results] == ["up/a.jpg", "up/b.jpg", "up/a.jpg"]
+    assert sorted(name for name, _ in bucket.uploads) == ["up/a.jpg", "up/b.jpg"]
@@ -0,0 +1,80 @@
+"""
+ImageSelector 不重复选择测试
+"""
+
+import json
+from pathlib import Path
+
+from ai_image_generator.image_selector import ImageSelector
+
+
+def test_select_unique_image_with_duplicate_paths():
+    """图片列表中同一路径重复出现时，选中一次即全部标记为已使用"""
+    selector = ImageSelector()
+    images = [Path("/a/1.jpg"), Path("/a/2.jpg"), Path("/a/1.jpg")]
+    
+    selected = [selector.select_unique_image(images) for _ in range(2)]
+    
+    assert sorted(selected) == [Path("/a/1.jpg"), Path("/a/2.jpg")]
+    assert selector.select_unique_image(images) is None
+    assert selector.get_remaining_images_count(images) == 0
+    assert selector.get_remaining_images(images) == []
+
+
+def test_rebinds_after_in_place_modification():
+    """图片列表被原地修改（长度不变）并重新 set_corpus 后，按新内容选择"""
+    selector = ImageSelector()
+    images = [Path("/a/1.jpg"), Path("/a/2.jpg")]
+    assert selector.get_remaining_images_count(images) == 2
+    
+    images[0] = Path("/a/3.jpg")
+    selector.set_corpus(images)
+    selector.mark_image_used(Path("/a/2.jpg"))
+    
+    assert selector.select_unique_image(images) == Path("/a/3.jpg")
+    assert selector.select_unique_image(images) is None
+
+
+def test_load_prompts_with_numeric_id(tmp_path):
+    """JSON 中 id/name/tags 为数字时按字符串加载"""
+    path = tmp_path / "prompts.json"
+    path.write_text(json.dumps({"prompts": [
+        {"id": 1, "name": 2, "tags": [3, "a"], "template": "t"},
+    ]}), encoding="utf-8")
+    selector = ImageSelector()
+    prompts = selector.load_prompts_from_json(path)
+    
+    assert prompts[0].id == "1"
+    assert prompts[0].name == "2"
+    assert prompts[0].tags == ("3", "a")
+    assert selector.find_prompt_by_id(prompts, "1") is prompts[0]
+
+
+def _reference_find(images, target_path):
+    """逐个遍历的查找语义：第一张满足任一条件的图片"""
+    target = Path(target_path)
+    for img in images:
+        if img == target or str(img) == target_path:
+            return img
+        if img.name == target.name:
+            return img
+        if str(img).endswith(target_path):
+            return img
+    return None
+
+
+def test_find_image_with_colliding_names():
+    """重名图片按列表顺序返回第一张命中的图片（与逐个遍历一致）"""
+    images = [
+        Path("/a/x/foo.jpg"),
+        Path("/b/foo.jpg"),
+        Path("/c/bar.png"),
+        Path("/d/xbar.png"),
+    ]
+    selector = ImageSelector()
+    for spec in ["/b/foo.jpg", "foo.jpg", "b/foo.jpg", "/d/xbar.png", "bar.png", "ar.png", "missing.jpg"]:
+        assert selector.find_image_by_path(images, spec) == _reference_find(images, spec), spec
+    
+    valid, errors = selector.validate_specified_images(["/b/foo.jpg", "/a/x/foo.jpg"], images)
+    assert valid == [Path("/a/x/foo.jpg")]
+    assert len(errors) == 1
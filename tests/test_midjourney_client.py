@@ -0,0 +1,44 @@
+"""
+MidjourneyClient 结果 URL 解析测试
+"""
+
+import json
+
+import pytest
+
+from ai_image_generator.midjourney_client import MidjourneyClient
+
+
+@pytest.fixture
+def client():
+    return MidjourneyClient(api_key="k")
+
+
+def test_parse_standard_result_urls(client):
+    """标准格式：resultUrls 为字典列表"""
+    info = {"resultUrls": [{"resultUrl": "https://a/1.png"}, {"resultUrl": "https://a/2.png"}]}
+    
+    assert client._parse_result_urls(info) == ["https://a/1.png", "https://a/2.png"]
+
+
+def test_parse_mixed_result_urls(client):
+    """resultUrls 中字典与字符串混合时逐项解析，跳过空项"""
+    info = {"resultUrls": [{"resultUrl": "https://a/1.png"}, "https://a/2.png", {}, None]}
+    
+    assert client._parse_result_urls(info) == ["https://a/1.png", "https://a/2.png"]
+
+
+def test_parse_fallback_keys(client):
+    """resultUrls 为空或为字符串时，依次尝试备用字段"""
+    assert client._parse_result_urls({"resultUrls": [], "urls": ["https://a/1.png"]}) == ["https://a/1.png"]
+    assert client._parse_result_urls({"resultUrls": "https://a/x.png", "images": "https://a/2.png"}) == ["https://a/2.png"]
+    assert client._parse_result_urls({"other": 1}) == []
+
+
+def test_parse_json_encoded(client):
+    """多层 JSON 编码的字符串逐层解码；非 JSON 的 http 字符串直接返回"""
+    info = json.dumps(json.dumps({"resultUrls": [{"resultUrl": "https://a/1.png"}]}))
+    
+    assert client._parse_result_urls(info) == ["https://a/1.png"]
+    assert client._parse_result_urls("https://a/raw.png") == ["https://a/raw.png"]
+    assert client._parse_result_urls("not a url") == []
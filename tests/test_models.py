@@ -0,0 +1,51 @@
+"""
+GroupResult 序列化测试
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+from ai_image_generator.models import GroupResult, ImageResult, TextResult
+
+
+def _make_group(**kwargs) -> GroupResult:
+    return GroupResult(
+        group_index=0,
+        group_dir=Path("/run/01"),
+        product_images=[Path("/p/1.jpg")],
+        reference_images=[],
+        prompt_template="t",
+        prompt_rendered="r",
+        images=[ImageResult(
+            index=1,
+            output_path=Path("/run/01/01.png"),
+            task_id="task",
+            prompt="r",
+            input_images=["https://x/1.jpg"],
+            success=True,
+        )],
+        **kwargs,
+    )
+
+
+def test_group_result_completed_at():
+    """completed_at 可通过构造参数传入，默认为 None"""
+    completed_at = datetime(2024, 1, 2, 3, 4, 5)
+    
+    assert _make_group().to_dict()["completed_at"] is None
+    assert _make_group(completed_at=completed_at).to_dict()["completed_at"] == completed_at.isoformat()
+
+
+def test_group_result_to_dict_reflects_current_fields():
+    """每次调用 to_dict 都按当前字段构建新字典"""
+    group = _make_group()
+    first = group.to_dict()
+    first["images"].clear()
+    
+    group.text_result = TextResult(title="标题", content="正文", success=True)
+    second = group.to_dict()
+    
+    assert second is not first
+    assert second["images"][0]["output_path"] == "/run/01/01.png"
+    assert second["text"]["title"] == "标题"
+    assert "text" not in first
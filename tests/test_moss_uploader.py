@@ -0,0 +1,73 @@
+"""
+MOSSUploader URL 缓存测试
+"""
+
+import os
+import threading
+
+from ai_image_generator.moss_uploader import MOSSUploader
+
+
+def _make_uploader(**kwargs) -> MOSSUploader:
+    return MOSSUploader("https://moss.example", "ak", "sk", "bucket", **kwargs)
+
+
+def test_cache_hit_and_invalidation(tmp_path):
+    """命中缓存；文件 mtime 变化或条目过期后不再命中"""
+    image = tmp_path / "a.jpg"
+    image.write_bytes(b"1")
+    uploader = _make_uploader()
+    uploader._cache_put(uploader._cache_key(image), "https://u/a", "id-a")
+    
+    assert uploader.get_cached_url(image) == "https://u/a"
+    
+    stat = image.stat()
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert uploader.get_cached_url(image) is None
+    
+    expired = _make_uploader(expire_seconds=0)
+    expired._cache_put(expired._cache_key(image), "https://u/a", "id-a")
+    assert expired.get_cached_url(image) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """超出容量时淘汰最久未使用的条目"""
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.jpg"
+        path.write_bytes(name.encode())
+        paths.append(path)
+    uploader = _make_uploader(max_cache_entries=2)
+    
+    uploader._cache_put(uploader._cache_key(paths[0]), "https://u/a", "a")
+    uploader._cache_put(uploader._cache_key(paths[1]), "https://u/b", "b")
+    assert uploader.get_cached_url(paths[0])  # a 变为最近使用
+    uploader._cache_put(uploader._cache_key(paths[2]), "https://u/c", "c")
+    
+    assert uploader.get_cached_url(paths[0]) == "https://u/a"
+    assert uploader.get_cached_url(paths[1]) is None
+    assert uploader.get_cached_url(paths[2]) == "https://u/c"
+
+
+def test_cache_concurrent_access_stays_bounded():
+    """多线程同时读写缓存时不出错，条目数不超过上限"""
+    uploader = _make_uploader(max_cache_entries=16)
+    errors = []
+    
+    def worker(offset: int):
+        try:
+            for i in range(2000):
+                key = (f"/img/{(offset + i) % 64}.jpg", 0)
+                uploader._cache_put(key, "https://u", "id")
+                uploader._cache_get(key)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert not errors
+    assert len(uploader._cache) <= 16
@@ -0,0 +1,51 @@
+"""
+OpenRouter 生成图片 base64 流式解码测试
+"""
+
+import base64
+import binascii
+import os
+
+import pytest
+
+from ai_image_generator import openrouter_image_client as client_module
+
+
+@pytest.mark.parametrize("chunk_chars", [4, 8, 64, 256 * 1024])
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 100, 5000])
+def test_write_base64_file_plain(tmp_path, monkeypatch, chunk_chars, size):
+    """不含换行的 base64 按块解码后与原始数据一致"""
+    monkeypatch.setattr(client_module, "_DECODE_CHUNK_CHARS", chunk_chars)
+    raw = os.urandom(size)
+    data_url = "data:image/png;base64," + base64.b64encode(raw).decode()
+    output = tmp_path / "out.png"
+    
+    client_module._write_base64_file(output, data_url, data_url.index(",") + 1)
+    
+    assert output.read_bytes() == raw
+
+
+@pytest.mark.parametrize("chunk_chars", [5, 7, 64, 256 * 1024])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_write_base64_file_wrapped(tmp_path, monkeypatch, chunk_chars, newline):
+    """按行折断的 base64 逐块去掉换行，块边界不对齐时也能正确解码"""
+    monkeypatch.setattr(client_module, "_DECODE_CHUNK_CHARS", chunk_chars)
+    raw = os.urandom(5000)
+    wrapped = base64.encodebytes(raw).decode().replace("\n", newline)
+    output = tmp_path / "out.png"
+    
+    client_module._write_base64_file(output, wrapped)
+    
+    assert output.read_bytes() == raw
+
+
+def test_write_base64_file_corrupt_keeps_target(tmp_path):
+    """数据损坏时保留原文件，并清理临时文件"""
+    output = tmp_path / "out.png"
+    output.write_bytes(b"old")
+    
+    with pytest.raises((binascii.Error, ValueError)):
+        client_module._write_base64_file(output, "abcde")
+    
+    assert output.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["out.png"]